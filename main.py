@@ -9,21 +9,60 @@ TODO: Complete the following functions:
 2. detect_suspicious_transactions() - Identify potentially fraudulent transactions
 """
 
+import argparse
+import os
+import sys
 import time
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from scripts.generate_transactions import generate_transactions
-
-
-# Configuration
-TRANSACTIONS_FOLDER = Path("./transactions")
-PROCESSED_FOLDER = Path("./processed")
-SUSPICIOUS_FOLDER = Path("./suspicious")
-INTERVAL_SECONDS = 60  # Generate transactions every 1 minute
-TRANSACTIONS_PER_BATCH = 100  # Number of transactions to generate each time
+from scripts.enrichment import enrich_transactions, get_reference_tables
+from scripts.velocity import apply_velocity_rules, record_velocity
+from scripts.fx_rates import get_fx_cache, normalize_currency
+from scripts.batch_journal import get_batch_journal, output_name
+from scripts.dedupe_index import get_dedupe_index
+from scripts.fraud_rules import evaluate_rules, rule_inputs, rule_params, split_by_mask
+from scripts.io_utils import atomic_write_csv
+from scripts.sketches import get_sketch_store
+from scripts.validation import CHECK_DUPLICATE, FUTURE_TOLERANCE_SECONDS, check_counts, reject_frame, validation_mask
+from scripts.warehouse_sink import close_warehouse_sink, get_warehouse_sink
+from scripts.write_behind import WriteBehindWriter
+from scripts.transaction_schema import (
+    CATEGORICAL_COLUMNS, encode_transaction_ids, to_fixed_categorical, to_output_frame
+)
+
+
+# Configuration (overridable with environment variables or command-line flags)
+TRANSACTIONS_FOLDER = Path(os.getenv("PIPELINE_TRANSACTIONS_FOLDER", "./transactions"))
+PROCESSED_FOLDER = Path(os.getenv("PIPELINE_PROCESSED_FOLDER", "./processed"))
+SUSPICIOUS_FOLDER = Path(os.getenv("PIPELINE_SUSPICIOUS_FOLDER", "./suspicious"))
+REJECTED_FOLDER = Path(os.getenv("PIPELINE_REJECTED_FOLDER", "./rejected"))
+INTERVAL_SECONDS = int(os.getenv("PIPELINE_INTERVAL_SECONDS", "60"))  # Generate transactions every 1 minute
+TRANSACTIONS_PER_BATCH = int(os.getenv("PIPELINE_TRANSACTIONS_PER_BATCH", "100"))  # Number of transactions to generate each time
 FAILED_ATTEMPT_THRESHOLD = 3
+GENERATOR_SEED = 2025  # Base seed; each batch derives its own seed from it
+DETECT_WORKERS = int(os.getenv("PIPELINE_DETECT_WORKERS", "1"))  # >1 shards detection by user_id across processes
+PARALLEL_DETECT_MIN_ROWS = 100_000  # Smaller batches are not worth the shared-memory copy
+IN_MEMORY_HANDOFF = os.getenv("PIPELINE_IN_MEMORY", "0") == "1"  # Process generated frames directly; write raw files behind
+WAREHOUSE_SINK = os.getenv("PIPELINE_WAREHOUSE_SINK", "0") == "1"  # Stream processed rows into PostgreSQL
+
+
+def build_generator_config():
+    """Generator config for the live pipeline: one logical window per interval"""
+    # El generador (y Faker) se importan solo cuando se generan lotes: --process y --worker no los cargan
+    from scripts.generate_transactions import GeneratorConfig
+    now = datetime.now().replace(microsecond=0)
+    return GeneratorConfig(
+        seed=GENERATOR_SEED,
+        # La secuencia de IDs sigue donde quedó (el journal guarda el último ID generado),
+        # así un reinicio nunca reutiliza IDs sin importar el ritmo de generación
+        start_id=get_batch_journal().last_id + 1,
+        # La ventana del lote 0 termina ahora; el lote N se genera al menos N intervalos después,
+        # cuando su ventana ya terminó, así que ningún timestamp queda en el futuro
+        start_time=now - timedelta(seconds=INTERVAL_SECONDS),
+        batch_seconds=INTERVAL_SECONDS,
+    )
 
 
 def setup_folders():
@@ -31,26 +70,46 @@ def setup_folders():
     TRANSACTIONS_FOLDER.mkdir(exist_ok=True)
     PROCESSED_FOLDER.mkdir(exist_ok=True)
     SUSPICIOUS_FOLDER.mkdir(exist_ok=True)
+    REJECTED_FOLDER.mkdir(exist_ok=True)
     print(f"Folders initialized:")
     print(f"  - Data Lake: {TRANSACTIONS_FOLDER}")
     print(f"  - Processed: {PROCESSED_FOLDER}")
     print(f"  - Suspicious: {SUSPICIOUS_FOLDER}")
+    print(f"  - Rejected: {REJECTED_FOLDER}")
+
+
+def generate_batch(config, batch_index, writer=None):
+    """
+    Generate a batch of fake transactions and save to data lake
 
+    With a write-behind writer the raw file is queued for a background thread
+    instead of being written here, so processing can start right away.
 
-def generate_batch():
-    """Generate a batch of fake transactions and save to data lake"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    Returns:
+        tuple: (raw file path, generated DataFrame)
+    """
+    from scripts.generate_transactions import generate_transactions_fast
+    # Microsegundos en el nombre: con intervalos menores a un segundo dos lotes no comparten archivo
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     filename = TRANSACTIONS_FOLDER / f"transactions_{timestamp}.csv"
+    if filename.exists():
+        raise FileExistsError(f"Raw file already exists, refusing to overwrite: {filename}")
 
     print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Generating {TRANSACTIONS_PER_BATCH} transactions...")
-    df = generate_transactions(TRANSACTIONS_PER_BATCH)
-    df.to_csv(filename, index=False)
-    print(f"Saved to: {filename}")
+    df = generate_transactions_fast(TRANSACTIONS_PER_BATCH, config, batch_index)
+    # Registrar el lote antes de escribirlo: si el proceso cae, la recuperación lo encuentra
+    get_batch_journal().begin(filename, last_id=config.next_id - 1)
+    if writer is not None:
+        writer.submit(df, filename)
+        print(f"Queued for write-behind: {filename}")
+    else:
+        atomic_write_csv(df, filename)
+        print(f"Saved to: {filename}")
 
-    return filename
+    return filename, df
 
 
-def clean_data(df):
+def clean_data(df, dedupe_index=None, validation_report=None):
     """
     TODO: Implement data cleaning logic
 
@@ -63,6 +122,9 @@ def clean_data(df):
 
     Args:
         df (pd.DataFrame): Raw transaction data
+        dedupe_index (DedupeIndex): Optional; drops IDs already seen in previous batches
+        validation_report (dict): Optional; receives 'rejected' (rows with their reject_mask)
+            and 'counts' (rows per validation check)
 
     Returns:
         pd.DataFrame: Cleaned transaction data
@@ -90,25 +152,51 @@ def clean_data(df):
     if faltantes:
         raise ValueError(f"Faltan columnas críticas en el DataFrame: {faltantes}")
 
-    # Filtrar solo las columnas críticas
-    df_clean = df_clean[columnas_criticas].copy()
-
-    # Eliminar filas con valores nulos en columnas críticas
-    df_clean.dropna(subset=columnas_criticas, inplace=True)
-
-    # Eliminar duplicados considerando solo columnas críticas
-    df_clean.drop_duplicates(subset=columnas_criticas, inplace=True)
-
-    # Estandarizar y validar tipos en columnas tipo texto
-    for col in ['transaction_id', 'user_id', 'merchant_id', 'currency', 'status', 'payment_method', 'country']:
-        df_clean[col] = df_clean[col].fillna('').astype(str).str.upper().str.strip()
+    # Filtrar solo las columnas críticas (se conservan los valores originales para los rechazos)
+    df_original = df_clean
+    df_raw = df_clean[columnas_criticas]
+    df_clean = df_raw.copy()
+
+    # Estandarizar a la representación compacta (scripts/transaction_schema.py):
+    # categóricas con diccionarios fijos, transaction_id como int64 e IDs como enteros.
+    # La estandarización de texto se hace sobre los valores únicos, no fila por fila.
+    df_clean['transaction_id'] = encode_transaction_ids(df_clean['transaction_id'])
+    for col in ['user_id', 'merchant_id']:
+        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
+    for col, dtype in CATEGORICAL_COLUMNS.items():
+        df_clean[col] = to_fixed_categorical(df_clean[col], dtype)
+    df_clean['response_message'] = df_clean['response_message'].astype('category')
 
     # Convertir columna 'amount' a numérico
     df_clean['amount'] = pd.to_numeric(df_clean['amount'], errors='coerce')
 
     # Convertir columna 'timestamp' a datetime
     df_clean['timestamp'] = pd.to_datetime(df_clean['timestamp'], errors='coerce')
-    df_clean.dropna(subset=['timestamp'], inplace=True)
+
+    # Validar todo en una pasada vectorizada (scripts/validation.py): nulos, conversiones
+    # fallidas, códigos desconocidos, montos <= 0, timestamps futuros e IDs repetidos en el lote.
+    # Las filas rechazadas se separan con su bitmask para escribirlas en ./rejected.
+    # La tolerancia nunca es menor que un intervalo: un lote puede cubrir una ventana de ese largo
+    reject_mask = validation_mask(df_raw, df_clean, future_tolerance=max(FUTURE_TOLERANCE_SECONDS, INTERVAL_SECONDS))
+    if validation_report is not None:
+        validation_report['rejected'] = reject_frame(df_original, reject_mask)
+        validation_report['counts'] = check_counts(reject_mask)
+    df_clean = df_clean[reject_mask == 0]
+    df_clean['transaction_id'] = df_clean['transaction_id'].astype('int64')
+    df_clean['user_id'] = df_clean['user_id'].astype('int32')
+    df_clean['merchant_id'] = df_clean['merchant_id'].astype('int32')
+
+    # Descartar IDs ya vistos en lotes anteriores (scripts/dedupe_index.py).
+    # También van a ./rejected, con el bit 'duplicate', para que el descarte quede registrado.
+    if dedupe_index is not None:
+        seen = dedupe_index.seen(df_clean['transaction_id'].to_numpy())
+        if validation_report is not None and seen.any():
+            duplicates = reject_frame(df_original.loc[df_clean.index],
+                                      np.where(seen, CHECK_DUPLICATE, 0).astype(np.uint16))
+            rejected = validation_report['rejected']
+            validation_report['rejected'] = pd.concat([rejected, duplicates]) if len(rejected) else duplicates
+            validation_report['counts']['duplicate'] = int(seen.sum())
+        df_clean = df_clean[~seen]
 
     # Manejo de outliers en 'amount' usando IQR
     # No se eliminan valores extremos para no afectar la detección de fraude.
@@ -132,113 +220,165 @@ def detect_suspicious_transactions(df):
     Detect suspicious transactions based on predefined fraud rules.
 
     Rules:
-    1. Amounts above 99th percentile.
+    1. Amounts above 99th percentile (in USD when normalize_currency() ran).
     2. ≥3 declined attempts by same user.
     3. Response message contains 'security'.
     4. Multiple transactions within 1 minute.
-    5. High-value cross-border transactions.
+    5. High-value cross-border transactions (requires enrich_transactions()).
     6. Transactions between 00:00–05:00.
+    7. Daily spend above the user's limit (requires apply_velocity_rules()).
+    8. Too many transactions by the same user within one hour (requires apply_velocity_rules()).
+
+    Each rule sets one bit of the uint8 'rule_mask' column, and 'risk_score' is the
+    weighted sum of the rules that fired (scripts/fraud_rules.py). Both columns are
+    kept in the outputs, so triage can filter by rule without re-running them.
 
     Returns:
         tuple: (normal_df, suspicious_df)
     """
     # YOUR CODE HERE
-    # Inicializar columna de sospecha
-    df = df.copy()
-    df['is_suspicious'] = False
-
-    HIGH_AMOUNT_PERCENTILE = 0.99
-    FAILED_ATTEMPT_THRESHOLD = 3
-    NIGHT_START = 0
-    NIGHT_END = 5
-    # 1. Montos inusualmente altos (mayores al percentil 99)
-    high_amount_threshold = df['amount'].quantile(HIGH_AMOUNT_PERCENTILE)
-    df.loc[df['amount'] > high_amount_threshold, 'is_suspicious'] = True
-
-    # 2. Múltiples intentos fallidos del mismo usuario (status == 'declined')
-    if 'user_id' in df.columns and 'status' in df.columns:
-        failed_attempts = df[df['status'].str.lower() == 'declined'].groupby('user_id').size()
-        suspicious_users = failed_attempts[failed_attempts >= FAILED_ATTEMPT_THRESHOLD].index
-        df.loc[df['user_id'].isin(suspicious_users), 'is_suspicious'] = True
-
-    # 3. Flaggear transacciones declined con códigos de seguridad
-    # Adaptado a los datos reales: solo response_message
-    if 'response_message' in df.columns:
-        df.loc[df['response_message'].str.contains('security', case=False, na=False), 'is_suspicious'] = True
-
-    # 4. Detectar patrones anómalos: múltiples transacciones en menos de 1 minuto por usuario
-    if 'user_id' in df.columns:
-        df_sorted = df.sort_values(['user_id', 'timestamp'])
-        df_sorted['time_diff'] = df_sorted.groupby('user_id')['timestamp'].diff().dt.total_seconds()
-        rapid_tx = df_sorted[(df_sorted['time_diff'] <= 60) & (df_sorted['time_diff'] > 0)]
-        df.loc[rapid_tx.index, 'is_suspicious'] = True
-
-    # 5. Transacciones internacionales de alto riesgo (país distinto al merchant y monto alto)
-    if 'merchant_country' in df.columns:
-        intl_risk = (df['country'] != df['merchant_country']) & (df['amount'] > high_amount_threshold)
-        df.loc[intl_risk, 'is_suspicious'] = True
-
-    NIGHT_START = 0
-    NIGHT_END = 5
-    # 6. Otros patrones: transacciones en horarios inusuales (ejemplo: entre 00:00 y 05:00)
-    df['hour'] = df['timestamp'].dt.hour
-    df.loc[df['hour'].between(NIGHT_START, NIGHT_END), 'is_suspicious'] = True
-
-    # Limpieza final: eliminar columnas auxiliares antes de retornar
-    for col in ['hour', 'time_diff']:
-        if col in df.columns:
-            df = df.drop(columns=[col])
-    # Separar DataFrames
-    suspicious_df = df[df['is_suspicious']].drop(columns=['is_suspicious', 'hour'], errors='ignore')
-    normal_df = df[~df['is_suspicious']].drop(columns=['is_suspicious', 'hour'], errors='ignore')
-    return normal_df, suspicious_df
-
-
-def process_batch(raw_file):
+    # Las reglas se evalúan sobre arrays (scripts/fraud_rules.py); el modo paralelo
+    # (scripts/parallel_detection.py) usa las mismas funciones por shards de user_id
+    inputs = rule_inputs(df)
+    rule_mask = evaluate_rules(inputs, rule_params(df, inputs))
+
+    # Separar DataFrames (con rule_mask y risk_score, sin las columnas auxiliares de velocidad)
+    return split_by_mask(df, rule_mask)
+
+
+def _run_stage(name, fn, df, stage_times):
+    """Run one pipeline stage, accumulating its duration in stage_times"""
+    started = time.perf_counter()
+    result = fn(df)
+    if stage_times is not None:
+        stage_times[name] = stage_times.get(name, 0.0) + time.perf_counter() - started
+    return result
+
+
+def transform_batch(df_raw, stage_times=None, dedupe_index=None, validation_report=None):
+    """
+    Run the in-memory stages of the pipeline on a raw batch
+
+    Args:
+        df_raw (pd.DataFrame): Raw transaction data
+        stage_times (dict): Optional; accumulates the seconds spent in each stage
+        dedupe_index (DedupeIndex): Optional; cross-batch duplicate filter used by clean_data
+        validation_report (dict): Optional; filled by clean_data with the rejected rows and counts
+
+    Returns:
+        tuple: (df_clean, df_normal, df_suspicious)
+    """
+    df_clean = _run_stage('clean', lambda df: clean_data(df, dedupe_index, validation_report), df_raw, stage_times)
+    df = _run_stage('fx', normalize_currency, df_clean, stage_times)
+    df = _run_stage('enrich', enrich_transactions, df, stage_times)
+    df = _run_stage('velocity', apply_velocity_rules, df, stage_times)
+    if DETECT_WORKERS > 1 and len(df) >= PARALLEL_DETECT_MIN_ROWS:
+        from scripts.parallel_detection import detect_suspicious_parallel
+        detect = lambda batch: detect_suspicious_parallel(batch, DETECT_WORKERS)
+    else:
+        detect = detect_suspicious_transactions
+    df_normal, df_suspicious = _run_stage('detect', detect, df, stage_times)
+    return df_clean, df_normal, df_suspicious
+
+
+def process_batch(raw_file, df_raw=None, stage_times=None):
     """
     Process a batch of transactions through the ETL pipeline
 
+    Outputs are written atomically with names derived from the raw file, and the
+    batch is committed in the journal only after every output is on disk, so a
+    crash at any point leaves the batch pending and a retry overwrites the same files.
+
     Args:
         raw_file (Path): Path to the raw transaction CSV file
+        df_raw (pd.DataFrame): Optional; the batch already in memory (skips re-reading raw_file)
+        stage_times (dict): Optional; accumulates the seconds spent in each in-memory stage
     """
+    journal = get_batch_journal()
+    dedupe_index = get_dedupe_index()
+    journal.begin(raw_file)
     try:
-        # Read raw data from data lake
-        print(f"Reading data from: {raw_file}")
-        df_raw = pd.read_csv(raw_file)
+        # Read raw data from data lake (in-memory mode hands the generated frame over directly)
+        if df_raw is None:
+            print(f"Reading data from: {raw_file}")
+            df_raw = pd.read_csv(raw_file)
         print(f"Loaded {len(df_raw)} transactions")
 
-        # Step 1: Clean the data
-        print("Cleaning data...")
-        df_clean = clean_data(df_raw)
+        # Clean, normalize, enrich and detect suspicious transactions
+        print("Cleaning data and detecting suspicious transactions...")
+        validation_report = {}
+        df_clean, df_normal, df_suspicious = transform_batch(
+            df_raw, stage_times, dedupe_index=dedupe_index, validation_report=validation_report
+        )
         print(f"Cleaned {len(df_clean)} transactions")
-
-        # Step 2: Detect suspicious transactions
-        print("Detecting suspicious transactions...")
-        df_normal, df_suspicious = detect_suspicious_transactions(df_clean)
+        df_rejected = validation_report['rejected']
+        if len(df_rejected) > 0:
+            counts = ", ".join(f"{name}={count}" for name, count in validation_report['counts'].items() if count)
+            print(f"Rejected {len(df_rejected)} transactions ({counts})")
         print(f"Found {len(df_suspicious)} suspicious transactions")
         print(f"Found {len(df_normal)} normal transactions")
 
-        # Save processed results
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Save processed results (atomic write, deterministic names per raw file)
+        outputs = []
 
         if len(df_normal) > 0:
-            normal_file = PROCESSED_FOLDER / f"processed_{timestamp}.csv"
-            df_normal.to_csv(normal_file, index=False)
+            normal_file = PROCESSED_FOLDER / output_name(raw_file, "processed")
+            atomic_write_csv(to_output_frame(df_normal), normal_file)
+            outputs.append(normal_file)
             print(f"Saved normal transactions to: {normal_file}")
 
         if len(df_suspicious) > 0:
-            suspicious_file = SUSPICIOUS_FOLDER / f"suspicious_{timestamp}.csv"
-            df_suspicious.to_csv(suspicious_file, index=False)
+            suspicious_file = SUSPICIOUS_FOLDER / output_name(raw_file, "suspicious")
+            atomic_write_csv(to_output_frame(df_suspicious), suspicious_file)
+            outputs.append(suspicious_file)
             print(f"WARNING: Saved suspicious transactions to: {suspicious_file}")
 
+        if len(df_rejected) > 0:
+            rejected_file = REJECTED_FOLDER / output_name(raw_file, "rejected")
+            atomic_write_csv(df_rejected, rejected_file)
+            outputs.append(rejected_file)
+            print(f"Saved rejected transactions to: {rejected_file}")
+
+        journal.commit(raw_file, len(df_raw), outputs)
+        # Los IDs se registran solo después del commit: un reintento del lote no los ve como duplicados
+        dedupe_index.add(df_clean['transaction_id'].to_numpy())
+        dedupe_index.save()
+        # Igual con los agregados de velocidad: un lote fallido y reintentado no se cuenta dos veces
+        df_scored = pd.concat([df_normal, df_suspicious])
+        record_velocity(df_scored)
+        # Sketches de monitoreo por minuto (usuarios distintos, heavy hitters sospechosos)
+        sketch_store = get_sketch_store()
+        sketch_store.update(df_clean, df_suspicious)
+        sketch_store.save()
+
+        # Envío al warehouse en lotes grandes (upsert idempotente por transaction_id)
+        if WAREHOUSE_SINK:
+            get_warehouse_sink().add(df_scored)
         print(f"Batch processing completed successfully")
 
     except NotImplementedError as e:
         print(f"WARNING: Skipping processing: {e}")
     except Exception as e:
+        journal.fail(raw_file, e)
         print(f"ERROR: Error processing batch: {e}")
 
 
+def recover_pending_batches():
+    """Reprocess batches left pending by a previous run (reads only the journal)"""
+    journal = get_batch_journal()
+    pending = journal.pending()
+    if not pending:
+        return
+    print(f"Recovering {len(pending)} pending batches from the journal...")
+    for entry in pending:
+        raw_file = Path(entry['raw_file'])
+        if not raw_file.exists():
+            print(f"WARNING: Raw file not found, marking batch as missing: {raw_file}")
+            journal.mark_missing(raw_file)
+            continue
+        process_batch(raw_file)
+
+
 def main():
     """Main loop - generates and processes transactions every minute"""
     print("="*60)
@@ -246,11 +386,15 @@ def main():
     print("="*60)
 
     setup_folders()
+    recover_pending_batches()
 
     print(f"\nStarting continuous processing (every {INTERVAL_SECONDS} seconds)")
     print("Press Ctrl+C to stop\n")
 
     batch_count = 0
+    generator_config = build_generator_config()
+    # Modo en memoria: el lote generado va directo a process_batch y el CSV crudo se escribe en segundo plano
+    writer = WriteBehindWriter() if IN_MEMORY_HANDOFF else None
 
     try:
         while True:
@@ -259,11 +403,11 @@ def main():
             print(f"BATCH #{batch_count}")
             print(f"{'='*60}")
 
-            # Generate new transactions
-            raw_file = generate_batch()
+            # Generate new transactions (el lote #1 usa la ventana 0, que termina al arrancar)
+            raw_file, df_raw = generate_batch(generator_config, batch_count - 1, writer)
 
             # Process the batch
-            process_batch(raw_file)
+            process_batch(raw_file, df_raw if writer is not None else None)
 
             # Wait for next interval
             print(f"\nWaiting {INTERVAL_SECONDS} seconds until next batch...")
@@ -272,9 +416,85 @@ def main():
     except KeyboardInterrupt:
         print("\n\nPipeline stopped by user")
         print(f"Total batches processed: {batch_count}")
+    finally:
+        if writer is not None:
+            print(f"Flushing {writer.pending} pending raw files...")
+            writer.close()
+        close_warehouse_sink()
+
+
+def process_files(raw_files):
+    """Process-only run: process the given raw files and exit (no generator import)"""
+    setup_folders()
+    recover_pending_batches()
+    for raw_file in raw_files:
+        process_batch(Path(raw_file))
+    close_warehouse_sink()
+
+
+def run_worker(stream):
+    """
+    Worker mode: process raw files whose paths arrive on `stream`, one per line
+
+    The process stays warm between batches (imports, reference tables, FX rates and
+    the detection pool are loaded once), so callers such as cron jobs or backfills
+    only pay the startup cost once.
+    """
+    setup_folders()
+    recover_pending_batches()
+    # Precargar los datos de referencia y las tasas antes del primer lote
+    get_reference_tables()
+    get_fx_cache().get_table()
+    print("Worker ready, reading raw file paths from stdin", flush=True)
+
+    processed = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        raw_file = Path(line.strip())
+        if not raw_file.exists():
+            print(f"WARNING: Raw file not found: {raw_file}", flush=True)
+            continue
+        process_batch(raw_file)
+        processed += 1
+        sys.stdout.flush()
+    close_warehouse_sink()
+    print(f"Worker finished, {processed} batches processed")
+
+
+def parse_args():
+    """Command-line overrides for the pipeline configuration"""
+    parser = argparse.ArgumentParser(description="Transaction processing pipeline")
+    parser.add_argument("--interval", type=int, default=INTERVAL_SECONDS,
+                        help="Seconds between batches (PIPELINE_INTERVAL_SECONDS)")
+    parser.add_argument("--batch-size", type=int, default=TRANSACTIONS_PER_BATCH,
+                        help="Transactions per batch (PIPELINE_TRANSACTIONS_PER_BATCH)")
+    parser.add_argument("--detect-workers", type=int, default=DETECT_WORKERS,
+                        help="Processes for user-sharded fraud detection (PIPELINE_DETECT_WORKERS)")
+    parser.add_argument("--in-memory", action="store_true", default=IN_MEMORY_HANDOFF,
+                        help="Process generated batches in memory and write raw files behind (PIPELINE_IN_MEMORY=1)")
+    parser.add_argument("--warehouse-sink", action="store_true", default=WAREHOUSE_SINK,
+                        help="Stream processed rows into PostgreSQL (PIPELINE_WAREHOUSE_SINK=1)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--process", nargs="+", metavar="RAW_FILE",
+                      help="Process the given raw files and exit (no generation)")
+    mode.add_argument("--worker", action="store_true",
+                      help="Stay warm and process raw file paths read from stdin, one per line")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    INTERVAL_SECONDS = args.interval
+    TRANSACTIONS_PER_BATCH = args.batch_size
+    DETECT_WORKERS = args.detect_workers
+    IN_MEMORY_HANDOFF = args.in_memory
+    WAREHOUSE_SINK = args.warehouse_sink
+    if args.worker:
+        run_worker(sys.stdin)
+    elif args.process:
+        process_files(args.process)
+    else:
+        main()
 
 
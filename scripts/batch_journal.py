@@ -0,0 +1,168 @@
+"""
+Journal de lotes para commits exactly-once y recuperación ante caídas.
+
+Cada archivo crudo del Data Lake pasa por los estados:
+    pending   -> registrado, todavía sin salidas confirmadas
+    failed    -> el procesamiento falló (se reintenta al reiniciar)
+    committed -> salidas escritas de forma atómica; no se vuelve a procesar
+    missing   -> el archivo crudo no existe (el lote se perdió antes de escribirse)
+
+El journal es un archivo JSONL de solo anexado con fsync en cada registro. Cuando
+acumula COMPACT_THRESHOLD lotes confirmados se reescribe (de forma atómica) solo
+con los pendientes, así que al reiniciar se lee un archivo pequeño: la
+recuperación es O(lotes pendientes) y no requiere recorrer ./transactions.
+
+Las salidas de un lote tienen nombres derivados del archivo crudo, por lo que un
+reintento sobrescribe los mismos archivos en lugar de duplicarlos.
+
+begin() también registra el último transaction_id generado (last_id). Al
+reiniciar, el generador continúa desde ahí en lugar de reutilizar IDs que el
+índice de deduplicación descartaría. La compactación conserva ese valor.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from scripts.io_utils import atomic_write, fsync_directory
+
+
+# Configuración
+JOURNAL_FILE = Path("./journal/batches.jsonl")
+COMPACT_THRESHOLD = 1000  # Lotes confirmados antes de compactar el journal
+MAX_ATTEMPTS = 3  # Reintentos antes de dejar un lote fallido fuera de la recuperación
+
+PENDING_STATUSES = ("pending", "failed")
+
+
+class BatchJournal:
+    """Journal persistente del estado de cada archivo crudo."""
+
+    def __init__(self, path=JOURNAL_FILE, compact_threshold=COMPACT_THRESHOLD):
+        self.path = Path(path)
+        self.compact_threshold = compact_threshold
+        self._pending = {}
+        self._committed_since_compact = 0
+        self.last_id = 0  # Último transaction_id generado (numérico)
+        self._replay()
+
+    def _replay(self):
+        """Reconstruye los lotes pendientes a partir del journal."""
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Última línea truncada por una caída durante el append
+                self.last_id = max(self.last_id, record.get("last_id", 0))
+                if "raw_file" not in record:
+                    continue  # Registro de la secuencia de IDs escrito por compact()
+                key = record["raw_file"]
+                if record["status"] in PENDING_STATUSES:
+                    self._pending[key] = {**self._pending.get(key, {}), **record}
+                else:
+                    self._pending.pop(key, None)
+                    self._committed_since_compact += 1
+
+    def _append(self, record):
+        record["at"] = datetime.now().isoformat(timespec="seconds")
+        new_file = not self.path.exists()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if new_file:
+            fsync_directory(self.path.parent)
+
+    def begin(self, raw_file, last_id=None):
+        """
+        Registra un archivo crudo como pendiente (idempotente).
+
+        Args:
+            raw_file (Path): Archivo crudo del lote
+            last_id (int): Último transaction_id del lote, si lo generó este proceso
+        """
+        key = str(raw_file)
+        if key in self._pending:
+            return
+        record = {"raw_file": key, "status": "pending", "attempts": 0, "offset": 0}
+        if last_id is not None:
+            record["last_id"] = int(last_id)
+            self.last_id = max(self.last_id, int(last_id))
+        self._append(dict(record))
+        self._pending[key] = record
+
+    def commit(self, raw_file, rows, outputs):
+        """
+        Confirma un lote después de escribir todas sus salidas.
+
+        Args:
+            raw_file (Path): Archivo crudo procesado
+            rows (int): Filas procesadas del lote (del DataFrame en memoria, no del archivo:
+                con write-behind el crudo puede no estar en disco todavía)
+            outputs (list[Path]): Archivos de salida escritos
+        """
+        key = str(raw_file)
+        self._append({
+            "raw_file": key, "status": "committed", "offset": int(rows),
+            "outputs": [str(p) for p in outputs],
+        })
+        self._pending.pop(key, None)
+        self._committed_since_compact += 1
+        if self._committed_since_compact >= self.compact_threshold:
+            self.compact()
+
+    def fail(self, raw_file, error):
+        """Registra un intento fallido; el lote sigue pendiente hasta MAX_ATTEMPTS."""
+        key = str(raw_file)
+        attempts = self._pending.get(key, {}).get("attempts", 0) + 1
+        record = {"raw_file": key, "status": "failed", "attempts": attempts, "error": str(error)}
+        self._append(dict(record))
+        self._pending[key] = {**self._pending.get(key, {}), **record}
+
+    def mark_missing(self, raw_file):
+        """Cierra un lote cuyo archivo crudo no existe."""
+        key = str(raw_file)
+        self._append({"raw_file": key, "status": "missing"})
+        self._pending.pop(key, None)
+
+    def pending(self):
+        """Lotes a recuperar, sin los que agotaron MAX_ATTEMPTS."""
+        return [entry for entry in self._pending.values() if entry.get("attempts", 0) < MAX_ATTEMPTS]
+
+    def compact(self):
+        """Reescribe el journal solo con los lotes pendientes."""
+        def _write(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"status": "ids", "last_id": self.last_id}) + "\n")
+                for entry in self._pending.values():
+                    f.write(json.dumps(entry, default=str) + "\n")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.path, _write)
+        self._committed_since_compact = 0
+
+
+_batch_journal = None
+
+
+def get_batch_journal():
+    """Retorna el journal compartido del proceso."""
+    global _batch_journal
+    if _batch_journal is None:
+        _batch_journal = BatchJournal()
+    return _batch_journal
+
+
+def output_name(raw_file, prefix):
+    """
+    Nombre determinista de una salida a partir del archivo crudo.
+
+    transactions_20251026_114304_250113.csv -> processed_20251026_114304_250113.csv
+    """
+    stem = Path(raw_file).stem
+    suffix = stem.split("_", 1)[1] if "_" in stem else stem
+    return f"{prefix}_{suffix}.csv"
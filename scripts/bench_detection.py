@@ -0,0 +1,59 @@
+"""
+Benchmark de la detección de fraude serial vs. paralela por shards de user_id.
+
+Genera un lote, lo pasa por las etapas previas del pipeline (clean, fx, enrich,
+velocity) y mide detect_suspicious_transactions() contra
+detect_suspicious_parallel() con distintos números de workers. Verifica que el
+resultado paralelo sea idéntico al serial.
+
+Uso:
+    python -m scripts.bench_detection --rows 10000000 --workers 2 4 8 16
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from main import clean_data, detect_suspicious_transactions
+from scripts.enrichment import enrich_transactions
+from scripts.fx_rates import normalize_currency
+from scripts.generate_transactions import GeneratorConfig, generate_transactions_fast
+from scripts.parallel_detection import detect_suspicious_parallel
+from scripts.velocity import apply_velocity_rules
+
+
+BENCH_SECONDS = 86400
+
+
+def _time(fn, df):
+    start = time.perf_counter()
+    result = fn(df)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la detección serial vs. paralela.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    args = parser.parse_args()
+
+    config = GeneratorConfig(batch_seconds=BENCH_SECONDS)
+    df = clean_data(generate_transactions_fast(args.rows, config))
+    df = apply_velocity_rules(enrich_transactions(normalize_currency(df)))
+    print(f"Filas: {len(df):,}")
+
+    serial_s, (normal, suspicious) = _time(detect_suspicious_transactions, df)
+    print(f"{'Workers':>8}{'tiempo (s)':>12}{'speedup':>10}")
+    print(f"{'serial':>8}{serial_s:>12.2f}{1:>9.1f}x")
+    for workers in args.workers:
+        # La primera llamada arranca el pool; se mide la segunda
+        detect_suspicious_parallel(df, workers)
+        parallel_s, (p_normal, p_suspicious) = _time(lambda batch: detect_suspicious_parallel(batch, workers), df)
+        pd.testing.assert_frame_equal(normal, p_normal)
+        pd.testing.assert_frame_equal(suspicious, p_suspicious)
+        print(f"{workers:>8}{parallel_s:>12.2f}{serial_s / parallel_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark de memoria y tiempo de la representación compacta de transacciones.
+
+Compara el lote limpio con columnas de texto (object, como lo dejaba clean_data
+antes de scripts/transaction_schema.py) contra la representación compacta
+(categóricas fijas + IDs enteros) para 1 millón de filas.
+
+Uso:
+    python -m scripts.bench_memory
+"""
+
+import time
+
+from main import clean_data
+from scripts.generate_transactions import GeneratorConfig, generate_transactions_fast
+from scripts.transaction_schema import to_output_frame
+
+
+ROWS = 1_000_000
+REPEAT = 5
+
+
+def _legacy_frame(compact):
+    """Reconstruye la representación anterior: todo el texto como object."""
+    legacy = to_output_frame(compact)
+    for col in ['transaction_id', 'user_id', 'merchant_id', 'currency', 'status',
+                'payment_method', 'country', 'response_message']:
+        legacy[col] = legacy[col].astype(str).astype(object)
+    return legacy
+
+
+def _time(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    compact = clean_data(generate_transactions_fast(ROWS, GeneratorConfig()))
+    legacy = _legacy_frame(compact)
+
+    legacy_mb = legacy.memory_usage(deep=True).sum() / 1e6
+    compact_mb = compact.memory_usage(deep=True).sum() / 1e6
+    print(f"Filas: {len(compact):,}")
+    print(f"Memoria texto (object): {legacy_mb:,.1f} MB")
+    print(f"Memoria compacta:       {compact_mb:,.1f} MB  ({legacy_mb / compact_mb:.1f}x menos)")
+
+    operations = {
+        "status == DECLINED": (
+            lambda: legacy['status'].str.lower() == 'declined',
+            lambda: compact['status'] == 'DECLINED',
+        ),
+        "groupby(user_id).size()": (
+            lambda: legacy[legacy['status'].str.lower() == 'declined'].groupby('user_id').size(),
+            lambda: compact[compact['status'] == 'DECLINED'].groupby('user_id').size(),
+        ),
+        "country.isin()": (
+            lambda: legacy['country'].isin(['MX', 'BR']),
+            lambda: compact['country'].isin(['MX', 'BR']),
+        ),
+        "response_message contains": (
+            lambda: legacy['response_message'].str.contains('security', case=False),
+            lambda: compact['response_message'].str.contains('security', case=False),
+        ),
+    }
+    print(f"\n{'Operación':<30}{'texto (ms)':>12}{'compacta (ms)':>15}{'speedup':>10}")
+    for name, (legacy_fn, compact_fn) in operations.items():
+        legacy_ms = _time(legacy_fn)
+        compact_ms = _time(compact_fn)
+        print(f"{name:<30}{legacy_ms:>12.1f}{compact_ms:>15.1f}{legacy_ms / compact_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark de la regla 4 (transacciones rápidas).
+
+Compara la implementación anterior (sort_values + groupby().diff() sobre el
+DataFrame) contra rapid_transaction_mask (argsort sobre una clave int64) y
+muestra cuántas transacciones marca cada una.
+
+Uso:
+    python -m scripts.bench_rapid
+    python -m scripts.bench_rapid --rows 1000000 5000000
+"""
+
+import argparse
+import time
+
+from main import clean_data
+from scripts.generate_transactions import GeneratorConfig, generate_transactions_fast
+from scripts.rapid_detection import RAPID_WINDOW_SECONDS, rapid_transactions
+
+
+REPEAT = 3
+BENCH_SECONDS = 86400
+BENCH_USERS = 1_000_000
+
+
+def _legacy_rapid(df):
+    """Regla 4 tal como estaba en detect_suspicious_transactions()."""
+    df_sorted = df.sort_values(['user_id', 'timestamp'])
+    df_sorted['time_diff'] = df_sorted.groupby('user_id')['timestamp'].diff().dt.total_seconds()
+    rapid_tx = df_sorted[(df_sorted['time_diff'] <= RAPID_WINDOW_SECONDS) & (df_sorted['time_diff'] > 0)]
+    return df.index.isin(rapid_tx.index)
+
+
+def _time(fn, df):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = fn(df)
+    return (time.perf_counter() - start) / REPEAT * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la detección de transacciones rápidas.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'Filas':>12}{'anterior (ms)':>15}{'nueva (ms)':>12}{'speedup':>10}{'marcadas ant.':>15}{'marcadas nueva':>16}")
+    for rows in args.rows:
+        # Lote de un día: con BENCH_USERS usuarios hay pares rápidos sin que todo sea una ráfaga
+        config = GeneratorConfig(batch_seconds=BENCH_SECONDS, user_count=BENCH_USERS)
+        df = clean_data(generate_transactions_fast(rows, config))
+        legacy_ms, legacy_mask = _time(_legacy_rapid, df)
+        new_ms, new_mask = _time(rapid_transactions, df)
+        print(f"{len(df):>12,}{legacy_ms:>15.1f}{new_ms:>12.1f}{legacy_ms / new_ms:>9.1f}x"
+              f"{int(legacy_mask.sum()):>15,}{int(new_mask.sum()):>16,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark del costo de arranque (python -X importtime).
+
+Para cada punto de entrada importa el módulo en un proceso nuevo con
+`-X importtime`, suma el tiempo de importación y lista los módulos más caros.
+También verifica qué dependencias pesadas (Faker, SQLAlchemy, el generador)
+quedaron cargadas: en una corrida que solo procesa lotes no deberían aparecer.
+
+Uso:
+    python -m scripts.bench_startup
+    python -m scripts.bench_startup --module main --top 20
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+
+
+# Configuración
+MODULES = ["main", "scripts.load_to_postgres", "scripts.query_engine"]
+LAZY_MODULES = ["faker", "sqlalchemy", "scripts.generate_transactions", "scripts.parallel_detection"]
+REPEAT = 5
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_import(module):
+    """
+    Importa `module` en un proceso nuevo con -X importtime.
+
+    Returns:
+        tuple: (segundos de pared, us de importación del módulo,
+                [(dependencia directa, us acumulados)], módulos perezosos cargados)
+        o None si el módulo falla al importarse
+    """
+    check = f"import json, sys, {module}; print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", check], capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        return None
+
+    total_us, dependencies = 0, []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        depth = len(match.group(3))
+        if depth == 1 and match.group(4) == module:
+            total_us = int(match.group(2))
+        elif depth == 3:  # Importado directamente por un módulo de primer nivel
+            dependencies.append((match.group(4), int(match.group(2))))
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return wall, total_us, dependencies, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de importación de los puntos de entrada.")
+    parser.add_argument("--module", nargs="+", default=MODULES)
+    parser.add_argument("--top", type=int, default=8, help="Módulos más caros a listar")
+    args = parser.parse_args()
+
+    for module in args.module:
+        runs = [profile_import(module) for _ in range(REPEAT)]
+        if any(run is None for run in runs):
+            print(f"\n{module}: falla al importarse")
+            continue
+        wall, total_us, dependencies, loaded = min(runs, key=lambda run: run[0])
+        print(f"\n{module}: arranque {wall * 1000:.0f} ms (mejor de {REPEAT}), "
+              f"importación del módulo {total_us / 1000:.0f} ms")
+        for name, us in sorted(dependencies, key=lambda item: -item[1])[:args.top]:
+            print(f"  {name:<40}{us / 1000:>8.1f} ms")
+        print(f"  Dependencias perezosas cargadas: {', '.join(loaded) if loaded else 'ninguna'}")
+
+
+if __name__ == "__main__":
+    main()
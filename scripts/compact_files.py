@@ -0,0 +1,273 @@
+"""
+Script para compactar los CSV pequeños de ./transactions, ./processed, ./suspicious y ./rejected.
+
+main.py escribe un archivo nuevo por carpeta cada minuto (4.320 archivos al día,
+la mayoría con menos de 100 filas). Este script agrupa los archivos de una misma
+ventana de tiempo (hora o día, según el timestamp del nombre del archivo) y los
+fusiona en un único archivo Parquet columnar.
+
+Garantías:
+- Solo se compactan ventanas cerradas (más un margen de gracia), así que puede
+  ejecutarse en paralelo con main.py sin tocar archivos que se están escribiendo.
+- El Parquet se escribe de forma atómica (temporal + fsync + rename).
+- El manifiesto `_manifest.json` de cada carpeta es el punto de commit: un archivo
+  compactado solo es visible cuando aparece en el manifiesto, y los CSV de origen
+  listados en el manifiesto se ignoran aunque todavía no se hayan borrado.
+  Los lectores deben usar `list_data_files()` para obtener una vista consistente.
+
+Uso:
+    python -m scripts.compact_files --folder processed --window hour
+    python -m scripts.compact_files --folder all --window day
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.batch_journal import BatchJournal, output_name
+from scripts.io_utils import atomic_write, atomic_write_json
+
+
+# Configuración
+FOLDERS = {
+    "transactions": Path("./transactions"),
+    "processed": Path("./processed"),
+    "suspicious": Path("./suspicious"),
+    "rejected": Path("./rejected"),
+}
+# Carpetas con filas crudas (rechazadas tal como llegaron): se compactan como texto, sin convertir tipos
+TEXT_FOLDERS = {"rejected"}
+MANIFEST_NAME = "_manifest.json"
+LOCK_NAME = ".compact.lock"
+STALE_LOCK_SECONDS = 3600  # Un lock más antiguo se considera huérfano
+GRACE_SECONDS = 120  # Margen tras el cierre de la ventana antes de compactarla
+SMALL_FILE_BYTES = 8 * 1024 * 1024  # Archivos mayores no se consideran "pequeños"
+MIN_FILES = 2  # Mínimo de archivos por ventana para que valga la pena compactar
+
+WINDOWS = {
+    "hour": ("%Y%m%d_%H", timedelta(hours=1)),
+    "day": ("%Y%m%d", timedelta(days=1)),
+}
+# Los lotes de main.py llevan microsegundos (_%f); los nombres antiguos solo segundos
+BATCH_FILE_PATTERN = re.compile(r"^(?P<prefix>[a-z]+)_(?P<ts>\d{8}_\d{6})(?:_\d{6})?\.csv$")
+
+
+def parse_batch_file(path):
+    """
+    Extrae el prefijo y el timestamp de un archivo de lote (p.ej. processed_20251026_114304.csv).
+
+    Returns:
+        tuple: (prefix, datetime) o None si el nombre no sigue el patrón
+    """
+    match = BATCH_FILE_PATTERN.match(Path(path).name)
+    if not match:
+        return None
+    return match.group("prefix"), datetime.strptime(match.group("ts"), "%Y%m%d_%H%M%S")
+
+
+def window_bounds(batch_time, window):
+    """Retorna (clave, inicio, fin) de la ventana que contiene batch_time."""
+    key_format, length = WINDOWS[window]
+    key = batch_time.strftime(key_format)
+    start = datetime.strptime(key, key_format)
+    return key, start, start + length
+
+
+def load_manifest(folder):
+    """Lee el manifiesto de la carpeta (vacío si todavía no existe)."""
+    manifest_path = Path(folder) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {"files": []}
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_data_files(folder):
+    """
+    Lista los archivos de datos visibles de una carpeta de forma consistente.
+
+    Incluye los archivos compactados registrados en el manifiesto y los CSV que
+    aún no forman parte de ninguna compactación. Ignora Parquet huérfanos de una
+    compactación interrumpida y CSV ya compactados pendientes de borrar.
+
+    Returns:
+        list[Path]: Archivos ordenados por nombre
+    """
+    folder = Path(folder)
+    manifest = load_manifest(folder)
+    compacted = set()
+    files = []
+    for entry in manifest["files"]:
+        compacted.update(entry["sources"])
+        path = folder / entry["file"]
+        if path.exists():
+            files.append(path)
+    files.extend(p for p in folder.glob("*.csv") if p.name not in compacted)
+    return sorted(files, key=lambda p: p.name)
+
+
+def _acquire_lock(folder):
+    """Crea el lock de compactación de la carpeta. Retorna False si otro proceso lo tiene."""
+    lock_path = Path(folder) / LOCK_NAME
+    try:
+        if time.time() - lock_path.stat().st_mtime > STALE_LOCK_SECONDS:
+            lock_path.unlink(missing_ok=True)
+    except FileNotFoundError:
+        pass
+    try:
+        fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.write(fd, str(os.getpid()).encode())
+    os.close(fd)
+    return True
+
+
+def _release_lock(folder):
+    (Path(folder) / LOCK_NAME).unlink(missing_ok=True)
+
+
+def _recover(folder, manifest):
+    """
+    Termina o descarta compactaciones interrumpidas.
+
+    - Borra los CSV de origen que ya están registrados en el manifiesto.
+    - Borra Parquet que no llegaron a registrarse (el manifiesto no se actualizó).
+    """
+    registered = {entry["file"] for entry in manifest["files"]}
+    for entry in manifest["files"]:
+        for source in entry["sources"]:
+            (folder / source).unlink(missing_ok=True)
+    for path in folder.glob("*.parquet"):
+        if path.name not in registered:
+            print(f"Eliminando archivo compactado huérfano: {path.name}")
+            path.unlink()
+
+
+def _pending_groups(folder, window, now, excluded=()):
+    """Agrupa por prefijo y ventana los CSV pequeños de ventanas ya cerradas."""
+    groups = {}
+    for path in folder.glob("*.csv"):
+        if path.name in excluded:
+            continue
+        parsed = parse_batch_file(path)
+        if parsed is None or path.stat().st_size > SMALL_FILE_BYTES:
+            continue
+        prefix, batch_time = parsed
+        key, _, end = window_bounds(batch_time, window)
+        if end + timedelta(seconds=GRACE_SECONDS) > now:
+            continue  # Ventana abierta: main.py todavía puede escribir en ella
+        groups.setdefault((prefix, key), []).append(path)
+    return groups
+
+
+def _next_part_name(folder, manifest, prefix, key):
+    """Nombre del siguiente archivo compactado de la ventana (puede haber rezagados)."""
+    existing = {entry["file"] for entry in manifest["files"]}
+    part = 0
+    while True:
+        name = f"{prefix}_{key}_part{part:03d}.parquet"
+        if name not in existing and not (folder / name).exists():
+            return name
+        part += 1
+
+
+def compact_folder(folder, window="hour", min_files=MIN_FILES, now=None, excluded=(), as_text=False):
+    """
+    Compacta los CSV pequeños de una carpeta en archivos Parquet por ventana.
+
+    Args:
+        folder (Path): Carpeta a compactar
+        window (str): 'hour' o 'day'
+        min_files (int): Mínimo de archivos por ventana para compactarla
+        now (datetime): Hora de referencia (por defecto, la actual)
+        excluded (iterable): Nombres de archivo que no deben tocarse (p.ej. lotes en curso)
+        as_text (bool): Conservar los valores como texto (reject_mask sigue siendo entero)
+
+    Returns:
+        int: Número de archivos compactados generados
+    """
+    folder = Path(folder)
+    if not folder.exists():
+        print(f"La carpeta {folder} no existe, se omite.")
+        return 0
+    if not _acquire_lock(folder):
+        print(f"Otra compactación está en curso en {folder}, se omite.")
+        return 0
+
+    created = 0
+    try:
+        manifest = load_manifest(folder)
+        _recover(folder, manifest)
+        groups = _pending_groups(folder, window, now or datetime.now(), set(excluded))
+
+        for (prefix, key), paths in sorted(groups.items()):
+            if len(paths) < min_files:
+                continue
+            paths = sorted(paths, key=lambda p: p.name)
+            df = pd.concat([pd.read_csv(p, dtype=str if as_text else None) for p in paths], ignore_index=True)
+            if "reject_mask" in df:
+                df["reject_mask"] = df["reject_mask"].astype("uint16")
+            if "timestamp" in df and not as_text:
+                # Timestamp tipado en Parquet para permitir filtros por rango (predicate pushdown)
+                df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+
+            name = _next_part_name(folder, manifest, prefix, key)
+            atomic_write(folder / name, lambda tmp: df.to_parquet(tmp, index=False))
+
+            # Rango de timestamps de las transacciones, útil para podar archivos al consultar
+            timestamps = (pd.to_datetime(df["timestamp"], errors="coerce").dropna() if "timestamp" in df
+                          else pd.Series(dtype="datetime64[ns]"))
+            entry = {
+                "file": name,
+                "window": key,
+                "rows": int(len(df)),
+                "min_timestamp": str(timestamps.min()) if len(timestamps) else None,
+                "max_timestamp": str(timestamps.max()) if len(timestamps) else None,
+                "sources": [p.name for p in paths],
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            # Commit: a partir de aquí los lectores ven el Parquet y no los CSV
+            manifest["files"].append(entry)
+            atomic_write_json(manifest, folder / MANIFEST_NAME)
+
+            for path in paths:
+                path.unlink(missing_ok=True)
+            created += 1
+            print(f"{folder.name}: {len(paths)} archivos ({len(df)} filas) -> {name}")
+    finally:
+        _release_lock(folder)
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compacta los CSV pequeños del pipeline en Parquet.")
+    parser.add_argument("--folder", default="all", choices=["all", *FOLDERS.keys()])
+    parser.add_argument("--window", default="hour", choices=list(WINDOWS.keys()))
+    parser.add_argument("--min-files", type=int, default=MIN_FILES)
+    args = parser.parse_args()
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("Error: se requiere pyarrow para escribir Parquet (pip install pyarrow)")
+        exit(1)
+
+    # Los lotes pendientes en el journal no se tocan: ni el crudo ni sus salidas, que un
+    # reintento va a sobrescribir (output_name con el prefijo "transactions" da el crudo)
+    pending = {output_name(entry["raw_file"], prefix)
+               for entry in BatchJournal().pending() for prefix in FOLDERS}
+    names = FOLDERS.keys() if args.folder == "all" else [args.folder]
+    total = sum(compact_folder(FOLDERS[name], args.window, args.min_files, excluded=pending,
+                               as_text=name in TEXT_FOLDERS) for name in names)
+    print(f"Compactación finalizada: {total} archivos generados.")
+
+
+if __name__ == "__main__":
+    main()
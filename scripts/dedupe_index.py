@@ -0,0 +1,207 @@
+"""
+Índice de deduplicación de transaction_id entre lotes.
+
+clean_data() solo elimina duplicados dentro de un lote. Este índice recuerda los
+IDs de lotes anteriores para descartar los repetidos antes de cualquier otra etapa:
+
+- Ventana reciente exacta: los IDs de los últimos RECENT_WINDOW_BATCHES lotes se
+  guardan como arrays ordenados (uno por lote) y se consultan con searchsorted.
+  Dentro de la ventana no hay falsos positivos.
+- Historia larga: al salir de la ventana, los IDs pasan a un Bloom filter escalable
+  (etapas con capacidad creciente y tasa de error decreciente). Cada etapa es un
+  archivo de bits mapeado en memoria (np.memmap), así que se persiste sin
+  serializar y se comparte entre procesos. Puede haber falsos positivos con
+  probabilidad acotada por BLOOM_ERROR_RATE, nunca falsos negativos.
+
+Todas las operaciones son vectorizadas sobre arrays de IDs int64. Cada lote de la
+ventana se guarda una sola vez en su propio archivo (recent_<secuencia>.npy) y se
+borra cuando pasa al Bloom filter: save() no reescribe la ventana completa.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from scripts.hashing import splitmix64
+from scripts.io_utils import atomic_write, atomic_write_json
+
+
+# Configuración
+DEDUPE_FOLDER = Path("./dedupe_index")
+RECENT_WINDOW_BATCHES = 60  # Lotes con deduplicación exacta (1 hora con lotes de 1 minuto)
+BLOOM_INITIAL_CAPACITY = 1_000_000
+BLOOM_GROWTH = 2  # Cada etapa nueva tiene el doble de capacidad
+BLOOM_ERROR_RATE = 1e-6  # Tasa de error total objetivo
+BLOOM_TIGHTENING = 0.5  # Cada etapa tiene la mitad de error que la anterior
+
+
+class BloomStage:
+    """Bloom filter de tamaño fijo respaldado por un archivo mapeado en memoria."""
+
+    def __init__(self, path, capacity, error_rate, count=0):
+        self.path = Path(path)
+        self.capacity = int(capacity)
+        self.error_rate = float(error_rate)
+        self.count = int(count)
+        # Tamaño óptimo: m = -n ln(p) / ln(2)^2, k = m/n ln(2)
+        self.n_bits = int(np.ceil(-self.capacity * np.log(self.error_rate) / np.log(2) ** 2))
+        self.n_bits += (-self.n_bits) % 8
+        self.n_hashes = max(1, int(round(self.n_bits / self.capacity * np.log(2))))
+        mode = "r+" if self.path.exists() else "w+"
+        self.bits = np.memmap(self.path, dtype=np.uint8, mode=mode, shape=(self.n_bits // 8,))
+
+    def _positions(self, ids):
+        """Posiciones de bits (n x k) con doble hashing: h1 + i * h2."""
+        h1 = splitmix64(ids)
+        h2 = splitmix64(h1) | np.uint64(1)
+        i = np.arange(self.n_hashes, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.n_bits)
+
+    def add(self, ids):
+        positions = self._positions(ids).ravel()
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.int64),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+        self.count += len(ids)
+
+    def contains(self, ids):
+        positions = self._positions(ids)
+        bytes_ = self.bits[(positions >> np.uint64(3)).astype(np.int64)]
+        bits = (bytes_ >> (positions & np.uint64(7)).astype(np.uint8)) & np.uint8(1)
+        return bits.all(axis=1)
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def to_dict(self):
+        return {"file": self.path.name, "capacity": self.capacity,
+                "error_rate": self.error_rate, "count": self.count}
+
+
+class DedupeIndex:
+    """Índice persistente de IDs vistos: ventana exacta reciente + Bloom filter escalable."""
+
+    def __init__(self, folder=DEDUPE_FOLDER, window_batches=RECENT_WINDOW_BATCHES):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.window_batches = window_batches
+        self.recent = []  # [(secuencia de lote, IDs ordenados)]
+        self.batch_seq = 0
+        self.stages = []
+        self._unsaved = []  # Lotes de la ventana todavía sin archivo
+        self._expired = []  # Lotes que salieron de la ventana; su archivo se borra en save()
+        self._load()
+
+    def _recent_path(self, seq):
+        return self.folder / f"recent_{seq:010d}.npy"
+
+    def _load(self):
+        meta_path = self.folder / "meta.json"
+        if not meta_path.exists():
+            return
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        self.batch_seq = meta["batch_seq"]
+        self.stages = [BloomStage(self.folder / s["file"], s["capacity"], s["error_rate"], s["count"])
+                       for s in meta["stages"]]
+        for path in sorted(self.folder.glob("recent_*.npy")):
+            seq = int(path.stem.split("_")[1])
+            if self.batch_seq - self.window_batches < seq <= self.batch_seq:
+                self.recent.append((seq, np.load(path)))
+            else:
+                # Ya expirado, o escrito por un save() que no llegó a meta.json
+                path.unlink()
+
+    def _new_stage(self):
+        n = len(self.stages)
+        stage = BloomStage(
+            self.folder / f"bloom_{n:03d}.bin",
+            BLOOM_INITIAL_CAPACITY * BLOOM_GROWTH ** n,
+            BLOOM_ERROR_RATE * (1 - BLOOM_TIGHTENING) * BLOOM_TIGHTENING ** n,
+        )
+        self.stages.append(stage)
+        return stage
+
+    def _add_to_bloom(self, ids):
+        while len(ids):
+            stage = self.stages[-1] if self.stages and not self.stages[-1].full else self._new_stage()
+            room = stage.capacity - stage.count
+            stage.add(ids[:room])
+            ids = ids[room:]
+
+    def seen(self, ids):
+        """
+        Marca los IDs vistos en lotes anteriores.
+
+        Args:
+            ids (np.ndarray): transaction_id codificados como int64
+
+        Returns:
+            np.ndarray: Máscara booleana (True = ya visto)
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        mask = np.zeros(len(ids), dtype=bool)
+        for _, run in self.recent:
+            pos = np.searchsorted(run, ids)
+            mask |= run[np.minimum(pos, len(run) - 1)] == ids
+        pending = ~mask
+        for stage in self.stages:
+            if not pending.any():
+                break
+            mask[pending] |= stage.contains(ids[pending])
+            pending = ~mask
+        return mask
+
+    def add(self, ids):
+        """Registra los IDs de un lote confirmado y mueve a Bloom los que salen de la ventana."""
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        self.batch_seq += 1
+        if len(ids):
+            self.recent.append((self.batch_seq, ids))
+            self._unsaved.append(self.batch_seq)
+        expired = [(seq, run) for seq, run in self.recent if seq <= self.batch_seq - self.window_batches]
+        self.recent = [(seq, run) for seq, run in self.recent if seq > self.batch_seq - self.window_batches]
+        for seq, run in expired:
+            self._add_to_bloom(run)
+            self._expired.append(seq)
+
+    def save(self):
+        """
+        Persiste el índice: flush de los Bloom mapeados, lotes nuevos de la ventana y metadatos.
+
+        meta.json es el punto de commit. Los archivos de lotes expirados se borran
+        después, así que una caída en medio deja un estado que _load() sabe leer.
+        """
+        for stage in self.stages:
+            stage.bits.flush()
+        def _writer(run):
+            def _write(tmp):
+                with open(tmp, "wb") as f:
+                    np.save(f, run)
+            return _write
+
+        runs = dict(self.recent)
+        for seq in self._unsaved:
+            if seq in runs:
+                atomic_write(self._recent_path(seq), _writer(runs[seq]))
+        atomic_write_json(
+            {"batch_seq": self.batch_seq, "stages": [stage.to_dict() for stage in self.stages]},
+            self.folder / "meta.json",
+        )
+        for seq in self._expired:
+            self._recent_path(seq).unlink(missing_ok=True)
+        self._unsaved = []
+        self._expired = []
+
+
+_dedupe_index = None
+
+
+def get_dedupe_index():
+    """Retorna el índice de deduplicación compartido del proceso."""
+    global _dedupe_index
+    if _dedupe_index is None:
+        _dedupe_index = DedupeIndex()
+    return _dedupe_index
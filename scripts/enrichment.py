@@ -0,0 +1,214 @@
+"""
+Enriquecimiento de transacciones con los datos de referencia de ./data.
+
+Los archivos users.csv, companies.csv y payment_methods.csv se cargan una sola vez
+en tablas de búsqueda densas (arrays de NumPy indexados directamente por ID).
+Enriquecer un lote es entonces un `np.take` vectorizado por columna, O(1) por fila,
+sin `merge` ni índices de pandas por lote.
+
+Las tablas se recargan automáticamente cuando cambia el mtime de algún archivo
+de referencia (hot reload), sin reiniciar el pipeline. Las tablas densas se
+guardan en el cache binario de scripts/reference_cache.py, así que el arranque
+solo mapea archivos .npy y varios procesos comparten las mismas páginas.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scripts.reference_cache import cached_arrays
+from scripts.transaction_schema import COUNTRY_DTYPE, PAYMENT_METHODS
+
+
+# Configuración
+DATA_FOLDER = Path("./data")
+USERS_FILE = "users.csv"
+COMPANIES_FILE = "companies.csv"
+PAYMENT_METHODS_FILE = "payment_methods.csv"
+CACHE_LAYOUT = 2  # Cambia cuando cambian las tablas que arma _build() (invalida el cache binario)
+
+# Columna de referencia -> columna agregada al lote
+USER_COLUMNS = {
+    "country": "user_country",
+    "kyc_level": "user_kyc_level",
+    "risk_score": "user_risk_score",
+    "transaction_limit_daily": "user_daily_limit",
+}
+MERCHANT_COLUMNS = {
+    "country": "merchant_country",
+    "category": "merchant_category",
+    "risk_score": "merchant_risk_score",
+    "chargeback_rate": "merchant_chargeback_rate",
+}
+ENRICHMENT_COLUMNS = [
+    *USER_COLUMNS.values(),
+    *MERCHANT_COLUMNS.values(),
+    "payment_method_risk_score",
+]
+
+
+def _dense_table(ids, values, size):
+    """
+    Construye un array denso indexado por ID.
+
+    Las columnas de texto se guardan como códigos enteros (int16) más un array de
+    categorías; las numéricas como float64 con NaN en los IDs inexistentes.
+
+    Returns:
+        tuple: (array, categorías o None)
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    if pd.api.types.is_numeric_dtype(values):
+        table = np.full(size, np.nan)
+        table[ids] = values.to_numpy(dtype=float)
+        return table, None
+    codes, categories = pd.factorize(values)
+    table = np.full(size, -1, dtype=np.int16)
+    table[ids] = codes
+    return table, np.asarray(categories, dtype=object)
+
+
+def _lookup(table, categories, ids, valid):
+    """Busca los IDs en una tabla densa. Los IDs fuera de rango retornan NaN."""
+    values = np.take(table, ids)
+    if categories is None:
+        return np.where(valid, values, np.nan)
+    values = np.where(valid, values, -1)
+    return pd.Categorical.from_codes(values, categories=categories)
+
+
+def _id_array(series, size):
+    """Convierte una columna de IDs a int64 y marca los que existen en la tabla."""
+    ids = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+    valid = np.isfinite(ids) & (ids >= 0) & (ids < size)
+    return np.where(valid, ids, 0).astype(np.int64), valid
+
+
+class ReferenceTables:
+    """Tablas de búsqueda de usuarios, comercios y métodos de pago indexadas por ID."""
+
+    def __init__(self, data_folder=DATA_FOLDER):
+        self.data_folder = Path(data_folder)
+        self._mtimes = None
+        self.users = {}
+        self.merchants = {}
+        self.payment_method_risk = np.zeros((len(PAYMENT_METHODS), 0))
+        self.user_size = 0
+        self.merchant_size = 0
+        self.refresh_if_changed()
+
+    def _source_files(self):
+        return [self.data_folder / name for name in (USERS_FILE, COMPANIES_FILE, PAYMENT_METHODS_FILE)]
+
+    def refresh_if_changed(self):
+        """Recarga las tablas si algún archivo de referencia cambió. Retorna True si recargó."""
+        mtimes = tuple(os.stat(path).st_mtime_ns for path in self._source_files())
+        if mtimes == self._mtimes:
+            return False
+        self._load()
+        self._mtimes = mtimes
+        return True
+
+    def _build(self):
+        """Construye las tablas densas desde los CSV (solo cuando el cache binario no está vigente)."""
+        users = pd.read_csv(self.data_folder / USERS_FILE, usecols=["user_id", *USER_COLUMNS])
+        companies = pd.read_csv(self.data_folder / COMPANIES_FILE, usecols=["merchant_id", *MERCHANT_COLUMNS])
+        payment_methods = pd.read_csv(self.data_folder / PAYMENT_METHODS_FILE,
+                                      usecols=["user_id", "payment_type", "risk_score"])
+
+        user_size = int(max(users["user_id"].max(), payment_methods["user_id"].max())) + 1
+        merchant_size = int(companies["merchant_id"].max()) + 1
+
+        arrays = {}
+        for prefix, ids, frame, columns, size in [
+            ("user", users["user_id"], users, USER_COLUMNS, user_size),
+            ("merchant", companies["merchant_id"], companies, MERCHANT_COLUMNS, merchant_size),
+        ]:
+            for source, target in columns.items():
+                table, categories = _dense_table(ids, frame[source], size)
+                arrays[f"{prefix}__{target}"] = table
+                if categories is not None:
+                    arrays[f"{prefix}__{target}__categories"] = categories
+
+        # Riesgo por (tipo de método, usuario): el del método registrado del tipo usado en la
+        # transacción (el máximo si el usuario tiene varios del mismo tipo)
+        method_codes = pd.Categorical(payment_methods["payment_type"].str.upper(), categories=PAYMENT_METHODS).codes
+        known = method_codes >= 0
+        pm_risk = np.full((len(PAYMENT_METHODS), user_size), -np.inf)
+        np.maximum.at(pm_risk, (method_codes[known], payment_methods["user_id"].to_numpy(dtype=np.int64)[known]),
+                      payment_methods["risk_score"].to_numpy(dtype=float)[known])
+        pm_risk[np.isneginf(pm_risk)] = np.nan
+        arrays["payment_method_risk_score"] = pm_risk
+
+        info = {"users": len(users), "merchants": len(companies), "payment_methods": len(payment_methods)}
+        return arrays, info
+
+    def _load(self):
+        # Tablas densas mapeadas desde data/.cache (scripts/reference_cache.py); solo se
+        # parsean los CSV cuando cambió su contenido
+        arrays, info = cached_arrays(f"enrichment_v{CACHE_LAYOUT}", self._source_files(), self._build)
+
+        def tables(prefix, columns):
+            return {
+                column: (arrays[f"{prefix}__{column}"], arrays.get(f"{prefix}__{column}__categories"))
+                for column in columns
+            }
+        user_tables = tables("user", USER_COLUMNS.values())
+        merchant_tables = tables("merchant", MERCHANT_COLUMNS.values())
+
+        # Se reemplazan de una vez para que un lote nunca vea tablas a medio cargar
+        self.users, self.user_size = user_tables, len(arrays["user__user_country"])
+        self.merchants, self.merchant_size = merchant_tables, len(arrays["merchant__merchant_country"])
+        self.payment_method_risk = arrays["payment_method_risk_score"]
+        print(f"Reference data loaded: {info['users']} users, {info['merchants']} merchants, "
+              f"{info['payment_methods']} payment methods")
+
+    def enrich(self, df):
+        """
+        Agrega al lote los atributos de usuario, comercio y método de pago.
+
+        Args:
+            df (pd.DataFrame): Transacciones limpias (requiere user_id, merchant_id y payment_method)
+
+        Returns:
+            pd.DataFrame: Copia del lote con las columnas de ENRICHMENT_COLUMNS
+        """
+        self.refresh_if_changed()
+        df = df.copy()
+
+        user_ids, user_valid = _id_array(df["user_id"], self.user_size)
+        for column, (table, categories) in self.users.items():
+            df[column] = _lookup(table, categories, user_ids, user_valid)
+
+        merchant_ids, merchant_valid = _id_array(df["merchant_id"], self.merchant_size)
+        for column, (table, categories) in self.merchants.items():
+            df[column] = _lookup(table, categories, merchant_ids, merchant_valid)
+
+        # Riesgo del método de pago de la transacción (no de cualquier método del usuario)
+        method_codes = pd.Categorical(df["payment_method"], categories=PAYMENT_METHODS).codes.astype(np.int64)
+        method_valid = user_valid & (method_codes >= 0)
+        risk = self.payment_method_risk[np.where(method_valid, method_codes, 0), user_ids]
+        df["payment_method_risk_score"] = np.where(method_valid, risk, np.nan)
+
+        # Mismo diccionario que 'country' para comparar categóricas directamente
+        for column in ['user_country', 'merchant_country']:
+            df[column] = df[column].astype(COUNTRY_DTYPE)
+        return df
+
+
+_reference_tables = None
+
+
+def get_reference_tables(data_folder=DATA_FOLDER):
+    """Retorna la instancia compartida de ReferenceTables (se carga en el primer uso)."""
+    global _reference_tables
+    if _reference_tables is None:
+        _reference_tables = ReferenceTables(data_folder)
+    return _reference_tables
+
+
+def enrich_transactions(df):
+    """Enriquece un lote usando las tablas de referencia compartidas."""
+    return get_reference_tables().enrich(df)
@@ -0,0 +1,191 @@
+"""
+Reglas de detección de fraude evaluadas sobre arrays de NumPy.
+
+detect_suspicious_transactions() (main.py) y la ejecución paralela por shards
+(scripts/parallel_detection.py) usan estas mismas funciones, así que ambos
+caminos producen exactamente el mismo resultado:
+
+- rule_inputs(): extrae del lote las columnas que usan las reglas como arrays
+  planos (códigos de categóricas, epoch en ms, flags de velocidad).
+- rule_params(): calcula lo que depende del lote completo (percentiles de monto y
+  el diccionario de mensajes con 'security'). Es el único paso global.
+- evaluate_rules(): evalúa las reglas fila a fila y por usuario y retorna un
+  bitmask uint8 con un bit por regla (RULES). Las reglas por usuario
+  (declinadas, transacciones rápidas) solo necesitan ver todas las filas de cada
+  usuario, por lo que se pueden evaluar por particiones de user_id.
+- risk_score(): score ponderado 0-100 a partir del bitmask, con una tabla de
+  256 entradas (un take, sin volver a evaluar reglas).
+"""
+
+import numpy as np
+import pandas as pd
+
+from scripts.rapid_detection import RAPID_WINDOW_SECONDS, rapid_transaction_mask
+from scripts.transaction_schema import COUNTRY_DTYPE, STATUS_DTYPE, STATUSES, to_fixed_categorical
+
+
+# Configuración
+HIGH_AMOUNT_PERCENTILE = 0.99
+CROSS_BORDER_PERCENTILE = 0.95
+FAILED_ATTEMPT_THRESHOLD = 3
+NIGHT_START = 0
+NIGHT_END = 5
+VELOCITY_FLAGS = ['daily_limit_exceeded', 'hourly_velocity_exceeded']
+
+# Bit de cada regla en 'rule_mask' (uint8) y su peso en 'risk_score' (los pesos suman 100)
+RULE_HIGH_AMOUNT = 1 << 0
+RULE_REPEATED_DECLINES = 1 << 1
+RULE_SECURITY_MESSAGE = 1 << 2
+RULE_RAPID = 1 << 3
+RULE_CROSS_BORDER = 1 << 4
+RULE_NIGHT = 1 << 5
+RULE_DAILY_LIMIT = 1 << 6
+RULE_HOURLY_VELOCITY = 1 << 7
+RULES = {
+    'high_amount': (RULE_HIGH_AMOUNT, 15),
+    'repeated_declines': (RULE_REPEATED_DECLINES, 15),
+    'security_message': (RULE_SECURITY_MESSAGE, 20),
+    'rapid_transactions': (RULE_RAPID, 10),
+    'cross_border': (RULE_CROSS_BORDER, 10),
+    'night_hours': (RULE_NIGHT, 5),
+    'daily_limit': (RULE_DAILY_LIMIT, 15),
+    'hourly_velocity': (RULE_HOURLY_VELOCITY, 10),
+}
+# Score de cada una de las 256 combinaciones de reglas
+SCORE_TABLE = np.array(
+    [sum(weight for bit, weight in RULES.values() if mask & bit) for mask in range(256)], dtype=np.uint8
+)
+
+DECLINED_CODE = STATUSES.index('DECLINED')
+_MS_PER_HOUR = 3_600_000
+
+
+def rule_inputs(df):
+    """
+    Columnas del lote que usan las reglas, como arrays contiguos.
+
+    Returns:
+        dict[str, np.ndarray]: Un array por columna, todos de largo len(df)
+    """
+    # Comparar montos en USD cuando existe la normalización de moneda (50 CLP != 50 USD)
+    amount_col = 'amount_usd' if 'amount_usd' in df.columns else 'amount'
+    inputs = {
+        'amount': df[amount_col].to_numpy(dtype=float),
+        'user_id': df['user_id'].to_numpy(dtype=np.int64),
+        'epoch_ms': df['timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64),
+        'status': to_fixed_categorical(df['status'], STATUS_DTYPE).cat.codes.to_numpy(),
+        'response': pd.factorize(df['response_message'])[0].astype(np.int32),
+        'country': to_fixed_categorical(df['country'], COUNTRY_DTYPE).cat.codes.to_numpy(),
+    }
+    if 'merchant_country' in df.columns:
+        inputs['merchant_country'] = to_fixed_categorical(df['merchant_country'], COUNTRY_DTYPE).cat.codes.to_numpy()
+    for flag_col in VELOCITY_FLAGS:
+        if flag_col in df.columns:
+            inputs[flag_col] = df[flag_col].to_numpy(dtype=bool)
+    return inputs
+
+
+def _quantile(values, q):
+    values = values[~np.isnan(values)]
+    return float(np.quantile(values, q)) if len(values) else np.nan
+
+
+def rule_params(df, inputs):
+    """
+    Parámetros globales del lote: umbrales de monto y mensajes de seguridad.
+
+    Returns:
+        dict: high_threshold, cross_border_threshold, security_lookup
+    """
+    messages = pd.Series(pd.factorize(df['response_message'])[1], dtype=object)
+    return {
+        'high_threshold': _quantile(inputs['amount'], HIGH_AMOUNT_PERCENTILE),
+        'cross_border_threshold': _quantile(inputs['amount'], CROSS_BORDER_PERCENTILE),
+        # Un valor por mensaje distinto; la regla 3 es un take sobre los códigos
+        'security_lookup': messages.str.contains('security', case=False, na=False).to_numpy(dtype=bool),
+    }
+
+
+def _set(rule_mask, condition, bit):
+    rule_mask |= condition.astype(np.uint8) * np.uint8(bit)
+
+
+def evaluate_rules(inputs, params):
+    """
+    Evalúa las reglas de fraude.
+
+    Args:
+        inputs (dict): Arrays de rule_inputs() (o un subconjunto de filas con usuarios completos)
+        params (dict): Resultado de rule_params() sobre el lote completo
+
+    Returns:
+        np.ndarray: Bitmask uint8 por fila con las reglas que se cumplen (0 = normal)
+    """
+    amount = inputs['amount']
+    user_id = inputs['user_id']
+    rule_mask = np.zeros(len(amount), dtype=np.uint8)
+    if len(amount) == 0:
+        return rule_mask
+
+    # 1. Montos inusualmente altos (mayores al percentil 99)
+    _set(rule_mask, amount > params['high_threshold'], RULE_HIGH_AMOUNT)
+
+    # 2. Múltiples intentos fallidos del mismo usuario (status == 'DECLINED')
+    declined_users, declined_counts = np.unique(user_id[inputs['status'] == DECLINED_CODE], return_counts=True)
+    _set(rule_mask, np.isin(user_id, declined_users[declined_counts >= FAILED_ATTEMPT_THRESHOLD]),
+         RULE_REPEATED_DECLINES)
+
+    # 3. Transacciones con códigos de seguridad en response_message
+    response = inputs['response']
+    lookup = params['security_lookup']
+    if len(lookup):
+        _set(rule_mask, (response >= 0) & lookup[np.maximum(response, 0)], RULE_SECURITY_MESSAGE)
+
+    # 4. Múltiples transacciones del mismo usuario en menos de 1 minuto (ambos lados del par)
+    _set(rule_mask, rapid_transaction_mask(user_id, inputs['epoch_ms'], RAPID_WINDOW_SECONDS * 1000), RULE_RAPID)
+
+    # 5. Transacciones internacionales de alto riesgo (país distinto al merchant y monto alto)
+    # El umbral es menor que el de la regla 1; con el mismo percentil la regla nunca agregaría nada.
+    if 'merchant_country' in inputs:
+        merchant_country = inputs['merchant_country']
+        cross_border = (
+            (merchant_country >= 0)
+            & (inputs['country'] != merchant_country)
+            & (amount > params['cross_border_threshold'])
+        )
+        _set(rule_mask, cross_border, RULE_CROSS_BORDER)
+
+    # 6. Horarios inusuales (entre 00:00 y 05:00)
+    hour = (inputs['epoch_ms'] // _MS_PER_HOUR) % 24
+    _set(rule_mask, (hour >= NIGHT_START) & (hour <= NIGHT_END), RULE_NIGHT)
+
+    # 7 y 8. Límite diario y velocidad por hora (agregados incrementales de scripts/velocity.py)
+    for flag_col, bit in [('daily_limit_exceeded', RULE_DAILY_LIMIT), ('hourly_velocity_exceeded', RULE_HOURLY_VELOCITY)]:
+        if flag_col in inputs:
+            _set(rule_mask, inputs[flag_col], bit)
+
+    return rule_mask
+
+
+def risk_score(rule_mask):
+    """Score ponderado (0-100) de cada fila: un take sobre la tabla de 256 combinaciones."""
+    return SCORE_TABLE[rule_mask]
+
+
+def rules_from_mask(mask):
+    """Nombres de las reglas presentes en un valor de rule_mask (para triage)."""
+    return [name for name, (bit, _) in RULES.items() if int(mask) & bit]
+
+
+def split_by_mask(df, rule_mask):
+    """
+    Separa el lote en (normal_df, suspicious_df) y quita las columnas auxiliares.
+
+    Ambos DataFrames llevan 'rule_mask' y 'risk_score' (0 en los normales), así que
+    el triage y el warehouse filtran por regla sin volver a evaluarlas.
+    """
+    df = df.drop(columns=VELOCITY_FLAGS, errors='ignore')
+    df['rule_mask'] = rule_mask
+    df['risk_score'] = risk_score(rule_mask)
+    is_suspicious = rule_mask != 0
+    return df[~is_suspicious], df[is_suspicious]
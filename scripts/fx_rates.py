@@ -0,0 +1,159 @@
+"""
+Normalización de montos a USD con una tabla de tipos de cambio vectorizada.
+
+La tabla de tipos de cambio se guarda como una matriz [fecha efectiva x moneda],
+con las monedas en el mismo orden que el diccionario fijo CURRENCIES. Convertir
+un lote es un `searchsorted` sobre las fechas más un indexado por los códigos
+de la categórica 'currency': no hay búsquedas fila por fila.
+
+Cada tipo de cambio rige desde su fecha efectiva hasta la siguiente, por lo que
+los backfills históricos usan la tasa vigente en la fecha de la transacción.
+
+Las tasas se obtienen de un proveedor intercambiable (por defecto data/fx_rates.csv)
+y se cachean en el proceso durante FX_CACHE_TTL_SECONDS.
+"""
+
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scripts.transaction_schema import CURRENCIES, CURRENCY_DTYPE, to_fixed_categorical
+
+
+# Configuración
+FX_RATES_FILE = Path("./data/fx_rates.csv")
+FX_CACHE_TTL_SECONDS = 3600
+RATE_COLUMNS = ["effective_date", "currency", "usd_per_unit"]
+
+
+class CsvRateProvider:
+    """Proveedor de tasas desde un CSV local (effective_date, currency, usd_per_unit)."""
+
+    def __init__(self, path=FX_RATES_FILE):
+        self.path = Path(path)
+
+    def __call__(self):
+        return pd.read_csv(self.path, usecols=RATE_COLUMNS)
+
+
+class StubRateProvider:
+    """
+    Proveedor simulado de una API de tipos de cambio.
+
+    Retorna tasas fijas con fecha efectiva de hoy. Sirve para pruebas locales y
+    como plantilla para un proveedor real: cualquier callable que retorne un
+    DataFrame con RATE_COLUMNS puede usarse en FxRateCache.
+    """
+
+    RATES = {"ARS": 0.00072, "BRL": 0.186, "CLP": 0.00104, "COP": 0.000257,
+             "MXN": 0.0543, "PEN": 0.288, "USD": 1.0}
+
+    def __call__(self):
+        today = date.today().isoformat()
+        return pd.DataFrame(
+            [(today, currency, rate) for currency, rate in self.RATES.items()],
+            columns=RATE_COLUMNS,
+        )
+
+
+class FxRateTable:
+    """Matriz de tasas USD por unidad, indexada por [fecha efectiva, código de moneda]."""
+
+    def __init__(self, rates):
+        rates = rates.copy()
+        rates['currency'] = to_fixed_categorical(rates['currency'], CURRENCY_DTYPE)
+        rates['effective_date'] = pd.to_datetime(rates['effective_date']).values.astype('datetime64[D]')
+        rates = rates.dropna(subset=['currency', 'usd_per_unit'])
+
+        matrix = (
+            rates.pivot_table(index='effective_date', columns='currency', values='usd_per_unit',
+                              aggfunc='last', observed=False)
+            .reindex(columns=CURRENCIES)
+            .sort_index()
+            .ffill()  # Una moneda sin tasa nueva conserva la última vigente
+        )
+        self.dates = matrix.index.values.astype('datetime64[D]')
+        self.matrix = matrix.to_numpy(dtype=float)
+
+    def convert(self, amounts, currency_codes, dates):
+        """
+        Convierte montos a USD con la tasa vigente en cada fecha.
+
+        Args:
+            amounts (np.ndarray): Montos en moneda original
+            currency_codes (np.ndarray): Códigos de CURRENCY_DTYPE (-1 = desconocida)
+            dates (np.ndarray): Fechas de las transacciones (datetime64)
+
+        Returns:
+            np.ndarray: Montos en USD (NaN si no hay tasa)
+        """
+        if len(self.dates) == 0:
+            return np.full(len(amounts), np.nan)
+        date_idx = np.searchsorted(self.dates, dates.astype('datetime64[D]'), side='right') - 1
+        date_idx = np.clip(date_idx, 0, len(self.dates) - 1)  # Antes de la primera fecha: tasa más antigua
+        rates = self.matrix[date_idx, np.clip(currency_codes, 0, None)]
+        rates = np.where(currency_codes >= 0, rates, np.nan)
+        return amounts * rates
+
+
+class FxRateCache:
+    """Cache en proceso de la tabla de tasas con expiración (TTL)."""
+
+    def __init__(self, provider=None, ttl_seconds=FX_CACHE_TTL_SECONDS):
+        self.provider = provider or CsvRateProvider()
+        self.ttl_seconds = ttl_seconds
+        self._table = None
+        self._loaded_at = 0.0
+
+    def get_table(self):
+        """Retorna la tabla vigente; la recarga si el TTL expiró."""
+        if self._table is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+            try:
+                self._table = FxRateTable(self.provider())
+                self._loaded_at = time.monotonic()
+            except Exception as e:
+                if self._table is None:
+                    raise
+                # Si el proveedor falla se sigue usando la última tabla conocida
+                print(f"WARNING: Could not refresh FX rates, using cached table: {e}")
+                self._loaded_at = time.monotonic()
+        return self._table
+
+    def invalidate(self):
+        self._table = None
+
+
+_fx_cache = None
+
+
+def get_fx_cache():
+    """Retorna el cache de tasas compartido del proceso."""
+    global _fx_cache
+    if _fx_cache is None:
+        _fx_cache = FxRateCache()
+    return _fx_cache
+
+
+def normalize_currency(df, cache=None):
+    """
+    Agrega la columna 'amount_usd' al lote.
+
+    Args:
+        df (pd.DataFrame): Transacciones limpias (currency categórica, timestamp datetime)
+        cache (FxRateCache): Cache de tasas (por defecto el compartido)
+
+    Returns:
+        pd.DataFrame: Copia del lote con 'amount_usd'
+    """
+    table = (cache or get_fx_cache()).get_table()
+    df = df.copy()
+    currency = to_fixed_categorical(df['currency'], CURRENCY_DTYPE)
+    df['amount_usd'] = table.convert(
+        df['amount'].to_numpy(dtype=float),
+        currency.cat.codes.to_numpy(),
+        df['timestamp'].to_numpy(dtype='datetime64[ns]'),
+    )
+    return df
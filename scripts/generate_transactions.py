@@ -1,177 +1,264 @@
+import time
 import pandas as pd
 import numpy as np
-from faker import Faker
 from datetime import datetime, timedelta
 
 
-def generate_transactions(n=10000):
+COUNTRIES = ["MX", "BR", "CO", "AR", "CL", "PE"]
+COUNTRY_WEIGHTS = [0.30, 0.25, 0.15, 0.15, 0.10, 0.05]
+CURRENCY_BY_COUNTRY = np.array(["MXN", "BRL", "COP", "ARS", "CLP", "PEN"], dtype=object)
+PAYMENT_TYPES = ["credit_card", "debit_card", "bank_transfer", "ewallet"]
+PAYMENT_TYPE_WEIGHTS = [0.40, 0.30, 0.20, 0.10]
+PROVIDERS = {
+    "credit_card": ["Visa", "Mastercard", "American Express", "Diners Club"],
+    "debit_card": ["Visa Debit", "Mastercard Debit", "Maestro"],
+    "bank_transfer": ["SPEI", "TEF", "PIX", "PSE", "Transferencia"],
+    "ewallet": ["PayPal", "MercadoPago", "Rappi Pay", "Clip"],
+}
+STATUSES = ["approved", "declined", "pending", "refunded", "cancelled"]
+STATUS_WEIGHTS = [0.82, 0.10, 0.03, 0.03, 0.02]
+DECLINE_CODES = ["05", "51", "54", "61", "65"]
+DECLINE_MESSAGES = ["Insufficient funds", "Expired card", "Invalid card",
+                    "Exceeds withdrawal limit", "Security violation"]
+CATEGORIES = ["retail", "food_beverage", "services", "tech", "entertainment",
+              "travel", "utilities", "other"]
+DEVICE_TYPES = ["mobile", "desktop", "tablet", "api"]
+DEVICE_WEIGHTS = [0.55, 0.30, 0.10, 0.05]
+NULLABLE_COLUMNS = ["currency", "amount", "country", "timestamp"]
+FRAUD_PATTERNS = ["high_amount", "night", "security_decline", "rapid_burst"]
+USER_AGENT_POOL_SIZE = 64
+
+
+class GeneratorConfig:
+    """
+    Configuración del generador determinista.
+
+    - Cada lote usa una semilla derivada de (seed, batch_index): los lotes son
+      distintos entre sí pero reproducibles.
+    - transaction_id sale de una secuencia global creciente (next_id), sin
+      repetir TXN00000001 en cada lote.
+    - duplicate_rate, null_rate y fraud_rate controlan la proporción de filas
+      duplicadas, con nulos y con patrones de fraude inyectados.
+    - Los timestamps caen en la ventana lógica del lote
+      [start_time + batch_index * batch_seconds, + batch_seconds).
+    - rows_per_second fija el ritmo objetivo de stream_batches().
+    """
+
+    def __init__(self, seed=2025, start_id=1, duplicate_rate=0.01, null_rate=0.005,
+                 fraud_rate=0.002, rows_per_second=None, start_time=None, batch_seconds=60,
+                 user_count=10000, merchant_count=1000):
+        self.seed = seed
+        self.next_id = start_id
+        self.duplicate_rate = duplicate_rate
+        self.null_rate = null_rate
+        self.fraud_rate = fraud_rate
+        self.rows_per_second = rows_per_second
+        self.start_time = start_time or datetime(2025, 10, 1)
+        self.batch_seconds = batch_seconds
+        self.user_count = user_count
+        self.merchant_count = merchant_count
+        self._user_agents = None
+
+    def rng(self, batch_index):
+        """Generador aleatorio del lote, derivado de la semilla global."""
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(batch_index,)))
+
+    def take_ids(self, n):
+        """Reserva n IDs consecutivos de la secuencia global."""
+        first = self.next_id
+        self.next_id += n
+        return np.arange(first, first + n, dtype=np.int64)
+
+    def user_agents(self):
+        """Pool fijo de user agents generado con Faker sembrado (una sola vez)."""
+        if self._user_agents is None:
+            from faker import Faker
+            fake = Faker()
+            fake.seed_instance(self.seed)
+            self._user_agents = np.array([fake.user_agent() for _ in range(USER_AGENT_POOL_SIZE)], dtype=object)
+        return self._user_agents
+
+
+def _choice_by_group(rng, groups, options_by_group):
+    """Elige una opción al azar dentro de la lista de opciones del grupo de cada fila."""
+    result = np.empty(len(groups), dtype=object)
+    for group, options in options_by_group.items():
+        mask = groups == group
+        result[mask] = rng.choice(options, size=mask.sum())
+    return result
+
+
+def _inject_fraud(rng, df, fraud_rate):
+    """Aplica patrones de fraude conocidos a una fracción de las filas."""
+    n_fraud = int(round(len(df) * fraud_rate))
+    if n_fraud == 0:
+        return
+    rows = rng.choice(len(df), size=n_fraud, replace=False)
+    patterns = rng.choice(FRAUD_PATTERNS, size=n_fraud)
+    index = df.index[rows]
+
+    high = index[patterns == "high_amount"]
+    df.loc[high, "amount"] = np.round(rng.uniform(15000, 50000, size=len(high)), 2)
+
+    night = index[patterns == "night"]
+    night_ts = df.loc[night, "timestamp"].dt.normalize() + pd.to_timedelta(rng.integers(0, 5 * 3600, size=len(night)), unit="s")
+    df.loc[night, "timestamp"] = night_ts
+
+    security = index[patterns == "security_decline"]
+    df.loc[security, ["status", "response_code", "response_message"]] = ["declined", "05", "Security violation"]
+    df.loc[security, ["fee_percentage", "transaction_fee", "net_amount"]] = 0
+
+    # Ráfaga: la fila copia usuario y timestamp de otra, pocos segundos después
+    burst = index[patterns == "rapid_burst"]
+    sources = df.index[rng.choice(len(df), size=len(burst))]
+    df.loc[burst, "user_id"] = df.loc[sources, "user_id"].to_numpy()
+    df.loc[burst, "timestamp"] = (df.loc[sources, "timestamp"] + pd.to_timedelta(rng.integers(0, 30, size=len(burst)), unit="s")).to_numpy()
+
+
+def generate_transactions_fast(n, config, batch_index=0):
     """
-    Genera dataset de transacciones coherente con:
-    - Users: user_id de 1 a 10000
-    - Companies: merchant_id de 1 a 1000
+    Genera un lote de transacciones vectorizado y reproducible.
+
+    Todo vectorizado con NumPy, sin bucles por fila ni llamadas a Faker por
+    transacción.
+
+    Args:
+        n (int): Número de filas del lote (incluye los duplicados inyectados)
+        config (GeneratorConfig): Configuración y secuencia global de IDs
+        batch_index (int): Índice del lote (determina la semilla y la ventana de tiempo)
+
+    Returns:
+        pd.DataFrame: Lote de transacciones
     """
-    fake = Faker()
-    np.random.seed(2025)
-
-    transactions = []
-    start_date = datetime.now() - timedelta(days=90)
-
-    # Tipos de métodos de pago coherentes
-    payment_methods = {
-        "credit_card": ["Visa", "Mastercard", "American Express", "Diners Club"],
-        "debit_card": ["Visa Debit", "Mastercard Debit", "Maestro"],
-        "bank_transfer": ["SPEI", "TEF", "PIX", "PSE", "Transferencia"],
-        "ewallet": ["PayPal", "MercadoPago", "Rappi Pay", "Clip"]
-    }
-
-    # Monedas por país
-    currency_by_country = {
-        "MX": "MXN",
-        "BR": "BRL",
-        "CO": "COP",
-        "AR": "ARS",
-        "CL": "CLP",
-        "PE": "PEN"
-    }
-
-    for i in range(n):
-        # IDs coherentes con los otros datasets
-        user_id = np.random.randint(1, 10001)  # 1-10000
-        merchant_id = np.random.randint(1, 1001)  # 1-1000
-
-        # País (misma distribución que users y companies)
-        country = np.random.choice(
-            ["MX", "BR", "CO", "AR", "CL", "PE"],
-            p=[0.30, 0.25, 0.15, 0.15, 0.10, 0.05]
-        )
-
-        # Moneda basada en el país
-        currency = currency_by_country.get(country, "USD")
-
-        # Posibilidad de transacciones internacionales (USD)
-        if np.random.random() < 0.15:  # 15% transacciones en USD
-            currency = "USD"
-
-        # Timestamp dentro de los últimos 90 días
-        timestamp = start_date + \
-            timedelta(seconds=np.random.randint(0, 90*24*3600))
-
-        # Tipo de método de pago
-        payment_type = np.random.choice(
-            ["credit_card", "debit_card", "bank_transfer", "ewallet"],
-            p=[0.40, 0.30, 0.20, 0.10]
-        )
-
-        # Provider específico según el tipo
-        payment_provider = np.random.choice(payment_methods[payment_type])
-
-        # Monto de transacción (distribución exponencial más realista)
-        amount = round(np.random.exponential(50), 2)
-
-        # Asegurar monto mínimo
-        if amount < 1:
-            amount = round(np.random.uniform(1, 10), 2)
-
-        # Estado de la transacción
-        status = np.random.choice(
-            ["approved", "declined", "pending", "refunded", "cancelled"],
-            p=[0.82, 0.10, 0.03, 0.03, 0.02]
-        )
-
-        # Código de respuesta según el estado
-        if status == "approved":
-            response_code = "00"
-            response_message = "Transaction approved"
-        elif status == "declined":
-            response_code = np.random.choice(["05", "51", "54", "61", "65"])
-            response_message = np.random.choice([
-                "Insufficient funds",
-                "Expired card",
-                "Invalid card",
-                "Exceeds withdrawal limit",
-                "Security violation"
-            ])
-        elif status == "pending":
-            response_code = "pending"
-            response_message = "Pending authorization"
-        else:
-            response_code = np.random.choice(["refund", "cancelled"])
-            response_message = f"Transaction {status}"
-
-        if np.random.random() < 0.002:
-            amount = round(np.random.uniform(15000, 50000), 2)
-
-        # Fees y comisiones
-        if status == "approved":
-            if payment_type in ["credit_card", "debit_card"]:
-                fee_percentage = round(np.random.uniform(2.5, 3.5), 2)
-            elif payment_type == "ewallet":
-                fee_percentage = round(np.random.uniform(3.0, 4.5), 2)
-            else:  # bank_transfer
-                fee_percentage = round(np.random.uniform(1.0, 2.0), 2)
-
-            transaction_fee = round(amount * fee_percentage / 100, 2)
-            net_amount = round(amount - transaction_fee, 2)
-        else:
-            fee_percentage = 0
-            transaction_fee = 0
-            net_amount = 0
-
-        # Información adicional
-        device_type = np.random.choice(
-            ["mobile", "desktop", "tablet", "api"],
-            p=[0.55, 0.30, 0.10, 0.05]
-        )
-
-        transaction = {
-            "transaction_id": f"TXN{str(i+1).zfill(8)}",
-            "user_id": user_id,
-            "merchant_id": merchant_id,
-            "amount": amount,
-            "currency": currency,
-            "status": status,
-            "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-            "payment_method": payment_type,
-            "payment_provider": payment_provider,
-            "country": country,
-            "response_code": response_code,
-            "response_message": response_message,
-            "fee_percentage": fee_percentage,
-            "transaction_fee": transaction_fee,
-            "net_amount": net_amount,
-            "device_type": device_type,
-            "ip_address": fake.ipv4(),
-            "user_agent": fake.user_agent() if device_type != "api" else "API/1.0",
-            "attempt_number": 1 if status != "declined" else np.random.randint(1, 4),
-            "processing_time_ms": np.random.randint(100, 3000),
-            "three_ds_verified": np.random.choice([True, False], p=[0.70, 0.30]) if payment_type in ["credit_card", "debit_card"] else None,
-            "installments": np.random.choice([1, 3, 6, 12], p=[0.70, 0.15, 0.10, 0.05]) if payment_type == "credit_card" and status == "approved" else 1,
-            "category": np.random.choice([
-                "retail", "food_beverage", "services", "tech", "entertainment",
-                "travel", "utilities", "other"
-            ]),
-            "is_international": currency == "USD" and country != "US",
-            "settlement_date": (timestamp + timedelta(days=np.random.randint(1, 3))).strftime("%Y-%m-%d") if status == "approved" else None
-        }
-
-        transactions.append(transaction)
-
-    df = pd.DataFrame(transactions)
-
-    # Introducir algunos nulos de manera intencional
-    null_indices = np.random.choice(
-        df.index, size=int(n * 0.005), replace=False)
-    df.loc[null_indices, "currency"] = None
-
-    null_indices = np.random.choice(
-        df.index, size=int(n * 0.01), replace=False)
-    df.loc[null_indices, "ip_address"] = None
+    rng = config.rng(batch_index)
+    n_duplicates = int(round(n * config.duplicate_rate))
+    n_unique = n - n_duplicates
+
+    country_idx = rng.choice(len(COUNTRIES), size=n_unique, p=COUNTRY_WEIGHTS)
+    country = np.array(COUNTRIES, dtype=object)[country_idx]
+    currency = CURRENCY_BY_COUNTRY[country_idx]
+    currency[rng.random(n_unique) < 0.15] = "USD"
+
+    window_start = pd.Timestamp(config.start_time) + pd.Timedelta(seconds=batch_index * config.batch_seconds)
+    timestamp = window_start + pd.to_timedelta(np.sort(rng.integers(0, config.batch_seconds, size=n_unique)), unit="s")
+
+    payment_type = rng.choice(PAYMENT_TYPES, size=n_unique, p=PAYMENT_TYPE_WEIGHTS)
+    amount = np.round(rng.exponential(50, size=n_unique), 2)
+    small = amount < 1
+    amount[small] = np.round(rng.uniform(1, 10, size=small.sum()), 2)
+
+    status = rng.choice(STATUSES, size=n_unique, p=STATUS_WEIGHTS)
+    approved = status == "approved"
+    declined = status == "declined"
+    response_code = np.where(approved, "00", np.where(status == "pending", "pending", "")).astype(object)
+    response_code[declined] = rng.choice(DECLINE_CODES, size=declined.sum())
+    other = ~approved & ~declined & (status != "pending")
+    response_code[other] = rng.choice(["refund", "cancelled"], size=other.sum())
+    response_message = np.where(approved, "Transaction approved",
+                                np.where(status == "pending", "Pending authorization",
+                                         "Transaction " + status.astype(object))).astype(object)
+    response_message[declined] = rng.choice(DECLINE_MESSAGES, size=declined.sum())
+
+    fee_low = np.select([np.isin(payment_type, ["credit_card", "debit_card"]), payment_type == "ewallet"], [2.5, 3.0], 1.0)
+    fee_high = np.select([np.isin(payment_type, ["credit_card", "debit_card"]), payment_type == "ewallet"], [3.5, 4.5], 2.0)
+    fee_percentage = np.where(approved, np.round(rng.uniform(fee_low, fee_high), 2), 0.0)
+    transaction_fee = np.round(amount * fee_percentage / 100, 2)
+    net_amount = np.where(approved, np.round(amount - transaction_fee, 2), 0.0)
+
+    device_type = rng.choice(DEVICE_TYPES, size=n_unique, p=DEVICE_WEIGHTS)
+    octets = rng.integers(1, 255, size=(n_unique, 4)).astype(str)
+    ip_address = pd.Series(octets[:, 0]) + "." + octets[:, 1] + "." + octets[:, 2] + "." + octets[:, 3]
+    user_agent = np.where(device_type == "api", "API/1.0", rng.choice(config.user_agents(), size=n_unique))
+
+    is_card = np.isin(payment_type, ["credit_card", "debit_card"])
+    three_ds = np.where(is_card, rng.random(n_unique) < 0.70, None)
+    installments = np.where((payment_type == "credit_card") & approved,
+                            rng.choice([1, 3, 6, 12], size=n_unique, p=[0.70, 0.15, 0.10, 0.05]), 1)
+    settlement = pd.Series(timestamp + pd.to_timedelta(rng.integers(1, 3, size=n_unique), unit="D")).dt.strftime("%Y-%m-%d")
+
+    df = pd.DataFrame({
+        "transaction_id": config.take_ids(n_unique),
+        "user_id": rng.integers(1, config.user_count + 1, size=n_unique),
+        "merchant_id": rng.integers(1, config.merchant_count + 1, size=n_unique),
+        "amount": amount,
+        "currency": currency,
+        "status": status,
+        "timestamp": timestamp,
+        "payment_method": payment_type,
+        "payment_provider": _choice_by_group(rng, payment_type, PROVIDERS),
+        "country": country,
+        "response_code": response_code,
+        "response_message": response_message,
+        "fee_percentage": fee_percentage,
+        "transaction_fee": transaction_fee,
+        "net_amount": net_amount,
+        "device_type": device_type,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "attempt_number": np.where(declined, rng.integers(1, 4, size=n_unique), 1),
+        "processing_time_ms": rng.integers(100, 3000, size=n_unique),
+        "three_ds_verified": three_ds,
+        "installments": installments,
+        "category": rng.choice(CATEGORIES, size=n_unique),
+        "is_international": currency == "USD",
+        "settlement_date": settlement.where(approved, None),
+    })
 
+    _inject_fraud(rng, df, config.fraud_rate)
+
+    # Duplicados exactos de filas del mismo lote, en posiciones aleatorias
+    if n_duplicates > 0:
+        duplicates = df.iloc[rng.choice(n_unique, size=n_duplicates)]
+        df = pd.concat([df, duplicates], ignore_index=True)
+        df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+    # Nulos en columnas críticas (y en ip_address, como el generador original)
+    n_nulls = int(round(len(df) * config.null_rate))
+    if n_nulls > 0:
+        rows = rng.choice(len(df), size=n_nulls, replace=False)
+        columns = rng.choice(NULLABLE_COLUMNS, size=n_nulls)
+        for column in NULLABLE_COLUMNS:
+            df.loc[rows[columns == column], column] = None
+        df.loc[rng.choice(len(df), size=min(len(df), 2 * n_nulls), replace=False), "ip_address"] = None
+
+    df["transaction_id"] = "TXN" + df["transaction_id"].astype(str).str.zfill(8)
+    df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
     return df
 
 
+def stream_batches(config, duration_seconds, tick_seconds=1.0, start_batch=0, rate_at=None):
+    """
+    Genera lotes al ritmo objetivo durante duration_seconds.
+
+    Cada tick produce rate * tick_seconds filas; si el consumidor es más lento
+    que el ritmo objetivo, los ticks siguientes no esperan (el atraso se
+    refleja en el tiempo real, no se descartan filas).
+
+    Args:
+        rate_at (callable): Ritmo (filas/s) en función de los segundos
+            transcurridos; por defecto, constante en config.rows_per_second
+
+    Yields:
+        tuple: (batch_index, pd.DataFrame)
+    """
+    if rate_at is None:
+        if not config.rows_per_second:
+            raise ValueError("config.rows_per_second o rate_at es obligatorio para stream_batches()")
+        rate_at = lambda seconds: config.rows_per_second
+    ticks = int(duration_seconds / tick_seconds)
+    started = time.monotonic()
+    for tick in range(ticks):
+        rows = max(1, int(round(rate_at(tick * tick_seconds) * tick_seconds)))
+        yield start_batch + tick, generate_transactions_fast(rows, config, start_batch + tick)
+        delay = started + (tick + 1) * tick_seconds - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
 if __name__ == "__main__":
-    df = generate_transactions(1000)
-    time = datetime.now().strftime("%m%d_%H%M%S")
-    filename = f"./transactions/transactions_{time}.csv"
+    # Un lote suelto de 1000 filas repartidas en los últimos 90 días
+    now = datetime.now()
+    config = GeneratorConfig(start_time=now - timedelta(days=90), batch_seconds=90 * 24 * 3600)
+    df = generate_transactions_fast(1000, config)
+    filename = f"./transactions/transactions_{now.strftime('%Y%m%d_%H%M%S_%f')}.csv"
     df.to_csv(filename, index=False)
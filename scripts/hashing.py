@@ -0,0 +1,20 @@
+"""
+Hashing vectorizado compartido por las estructuras probabilísticas.
+
+scripts/dedupe_index.py (Bloom filter) y scripts/sketches.py (HyperLogLog y
+Count-Min) derivan sus posiciones de splitmix64, así que ambos usan la misma
+función.
+"""
+
+import numpy as np
+
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def splitmix64(values):
+    """Mezcla de bits splitmix64 sobre uint64 (vectorizada)."""
+    z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return (z ^ (z >> np.uint64(31))) & _MASK64
@@ -0,0 +1,60 @@
+"""
+Utilidades de escritura atómica para los archivos del pipeline.
+
+Todas las escrituras siguen el mismo patrón: se escribe en un archivo temporal
+dentro de la misma carpeta, se hace fsync y se reemplaza el destino con
+os.replace. Un lector nunca ve un archivo a medio escribir: o ve la versión
+anterior o la nueva completa.
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+def fsync_directory(folder):
+    """Sincroniza la entrada de directorio para que el rename sobreviva a un crash."""
+    try:
+        fd = os.open(str(folder), os.O_RDONLY)
+    except OSError:
+        return  # Algunos sistemas (Windows) no permiten abrir directorios
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, write_fn):
+    """
+    Escribe un archivo de forma atómica.
+
+    Args:
+        path (Path): Ruta final del archivo
+        write_fn (callable): Función que recibe la ruta temporal y escribe el contenido
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        write_fn(tmp_path)
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    fsync_directory(path.parent)
+
+
+def atomic_write_csv(df, path):
+    """Guarda un DataFrame en CSV de forma atómica."""
+    atomic_write(path, lambda tmp: df.to_csv(tmp, index=False))
+
+
+def atomic_write_json(data, path):
+    """Guarda un diccionario en JSON de forma atómica."""
+    def _write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str)
+    atomic_write(path, _write)
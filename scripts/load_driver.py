@@ -0,0 +1,269 @@
+"""
+Generador de carga para medir el throughput del pipeline.
+
+Produce transacciones con el generador determinista a un ritmo objetivo (eventos
+por segundo), con rampa opcional, y las pasa por el pipeline. Por defecto solo
+corre las etapas en memoria (main.transform_batch): el resultado es un techo, no
+incluye escritura de archivos, journal ni índices. Con --full cada lote pasa por
+main.process_batch con el traspaso en memoria (el crudo se escribe en segundo
+plano), dentro de un directorio temporal que se borra al terminar. Reporta:
+
+- throughput logrado vs. ritmo ofrecido
+- crecimiento del backlog (filas generadas que esperan ser procesadas)
+- saturación por etapa: fracción del tiempo real que el consumidor pasa en
+  cada etapa (clean, fx, enrich, velocity, detect y, con --full, io: salidas,
+  journal, índice de deduplicación, velocidad y sketches)
+
+Con --find-max busca automáticamente el máximo ritmo sostenible: duplica el
+ritmo hasta que el pipeline deja de seguirlo y luego hace búsqueda binaria.
+
+Uso:
+    python -m scripts.load_driver --rate 10000 --duration 30
+    python -m scripts.load_driver --rate 10000 --duration 30 --full
+    python -m scripts.load_driver --rate 20000 --duration 60 --ramp 30
+    python -m scripts.load_driver --find-max --trial-seconds 10
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import main as pipeline
+from scripts.batch_journal import get_batch_journal
+from scripts.generate_transactions import GeneratorConfig, stream_batches
+from scripts.write_behind import WriteBehindWriter
+
+
+# Configuración
+TICK_SECONDS = 1.0
+SUSTAINABLE_RATIO = 0.95  # Throughput mínimo (respecto al ofrecido) para considerar sostenible un ritmo
+MAX_BACKLOG_TICKS = 2  # Backlog final máximo (en ticks de carga) para considerar sostenible un ritmo
+FIND_MAX_START_RATE = 1000
+FIND_MAX_SEARCH_STEPS = 4
+
+
+class LoadResult:
+    """Métricas de una corrida de carga."""
+
+    def __init__(self, target_rate, duration, full=False):
+        self.target_rate = target_rate
+        self.duration = duration
+        self.full = full
+        self.failed_batches = 0
+        self.offered_rows = 0
+        self.processed_rows = 0
+        self.elapsed = 0.0
+        self.backlog_samples = []  # (segundos, filas en cola)
+        self.stage_times = {}
+
+    @property
+    def achieved_rate(self):
+        return self.processed_rows / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def final_backlog(self):
+        return self.backlog_samples[-1][1] if self.backlog_samples else 0
+
+    def backlog_growth_per_second(self):
+        """Pendiente del backlog (filas/s) entre la primera y la última muestra."""
+        if len(self.backlog_samples) < 2:
+            return 0.0
+        (t0, b0), (t1, b1) = self.backlog_samples[0], self.backlog_samples[-1]
+        return (b1 - b0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def is_sustainable(self):
+        max_backlog = self.target_rate * TICK_SECONDS * MAX_BACKLOG_TICKS
+        offered_rate = self.offered_rows / self.duration if self.duration else 0.0
+        return self.achieved_rate >= SUSTAINABLE_RATIO * offered_rate and self.final_backlog <= max_backlog
+
+    def report(self):
+        if self.full:
+            print("\nModo:               pipeline completo (process_batch, carpetas temporales)")
+        else:
+            print("\nModo:               solo etapas en memoria (transform_batch, sin I/O)")
+        print(f"Ritmo objetivo:     {self.target_rate:,.0f} tx/s")
+        print(f"Filas ofrecidas:    {self.offered_rows:,}")
+        print(f"Filas procesadas:   {self.processed_rows:,}")
+        print(f"Throughput logrado: {self.achieved_rate:,.0f} tx/s")
+        print(f"Backlog final:      {self.final_backlog:,} filas "
+              f"(crecimiento {self.backlog_growth_per_second():,.0f} filas/s)")
+        print("Saturación por etapa (fracción del tiempo real):")
+        for stage, seconds in sorted(self.stage_times.items(), key=lambda item: -item[1]):
+            print(f"  {stage:<10} {seconds / self.elapsed:6.1%}")
+        print(f"  {'total':<10} {sum(self.stage_times.values()) / self.elapsed:6.1%}")
+        if self.full:
+            print(f"Lotes fallidos:     {self.failed_batches}")
+        print(f"Sostenible: {'sí' if self.is_sustainable() else 'no'}")
+
+
+def _producer(config, rate_at, duration, out_queue, result, stop):
+    """Encola los lotes de stream_batches() al ritmo indicado por rate_at(segundos)."""
+    for _, batch in stream_batches(config, duration, TICK_SECONDS, rate_at=rate_at):
+        if stop.is_set():
+            break
+        out_queue.put(batch)
+        result.offered_rows += len(batch)
+    out_queue.put(None)
+
+
+@contextlib.contextmanager
+def full_pipeline_workspace():
+    """
+    Directorio de trabajo temporal para --full.
+
+    Las carpetas del pipeline y su estado (journal, índice de deduplicación,
+    sketches) son rutas relativas, así que quedan dentro del directorio
+    temporal; ./data apunta a las tablas de referencia del repositorio.
+    """
+    previous = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="load_driver_") as workspace:
+        os.symlink(previous / "data", Path(workspace) / "data")
+        os.chdir(workspace)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                pipeline.setup_folders()
+            yield Path(workspace)
+        finally:
+            os.chdir(previous)
+
+
+def _process_full(batch, config, writer, stage_times):
+    """Pasa un lote por process_batch como lo hace main.py con --in-memory."""
+    raw_file = pipeline.TRANSACTIONS_FOLDER / f"transactions_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.csv"
+    get_batch_journal().begin(raw_file, last_id=config.next_id - 1)
+    writer.submit(batch, raw_file)
+    transform_seconds = sum(stage_times.values())
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.process_batch(raw_file, batch, stage_times)
+    elapsed = time.perf_counter() - started
+    stage_times["io"] = stage_times.get("io", 0.0) + elapsed - (sum(stage_times.values()) - transform_seconds)
+
+
+def run_load(rate, duration, ramp=0.0, seed=2025, verbose=True, full=False):
+    """
+    Ejecuta una corrida de carga a `rate` tx/s durante `duration` segundos.
+
+    Args:
+        rate (float): Ritmo objetivo (eventos por segundo)
+        duration (float): Duración de la generación en segundos
+        ramp (float): Segundos de rampa lineal desde 10% hasta `rate`
+        seed (int): Semilla del generador
+        full (bool): Procesa con process_batch; requiere full_pipeline_workspace()
+
+    Returns:
+        LoadResult: Métricas de la corrida
+    """
+    def rate_at(seconds):
+        if ramp and seconds < ramp:
+            return rate * (0.1 + 0.9 * seconds / ramp)
+        return rate
+
+    # Con --full el estado se comparte entre corridas: los IDs siguen la secuencia del journal
+    start_id = get_batch_journal().last_id + 1 if full else 1
+    config = GeneratorConfig(seed=seed, start_id=start_id, batch_seconds=int(TICK_SECONDS))
+    result = LoadResult(rate, duration, full)
+    writer = WriteBehindWriter() if full else None
+    batches = queue.Queue()
+    stop = threading.Event()
+    producer = threading.Thread(target=_producer, args=(config, rate_at, duration, batches, result, stop), daemon=True)
+
+    started = time.monotonic()
+    producer.start()
+    last_report = started
+    try:
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+            if full:
+                _process_full(batch, config, writer, result.stage_times)
+            else:
+                pipeline.transform_batch(batch, result.stage_times)
+            result.processed_rows += len(batch)
+
+            now = time.monotonic()
+            result.backlog_samples.append((now - started, result.offered_rows - result.processed_rows))
+            if verbose and now - last_report >= 5:
+                print(f"  t={now - started:5.1f}s  procesadas={result.processed_rows:,}  "
+                      f"backlog={result.offered_rows - result.processed_rows:,}")
+                last_report = now
+            # Si el backlog ya es varias veces el ritmo, la corrida no es sostenible: cortar
+            if result.offered_rows - result.processed_rows > rate * duration / 2:
+                break
+    finally:
+        stop.set()
+    result.elapsed = time.monotonic() - started
+    if full:
+        writer.close()
+        result.failed_batches = len(get_batch_journal().pending())
+    return result
+
+
+def find_max_rate(trial_seconds, start_rate=FIND_MAX_START_RATE, seed=2025, full=False):
+    """
+    Busca el máximo ritmo sostenible del pipeline.
+
+    Duplica el ritmo hasta encontrar uno no sostenible y luego hace
+    FIND_MAX_SEARCH_STEPS pasos de búsqueda binaria entre el último sostenible
+    y el primero que no lo es.
+
+    Returns:
+        float: Máximo ritmo sostenible encontrado (tx/s)
+    """
+    good, bad = 0.0, None
+    rate = start_rate
+    while bad is None:
+        result = run_load(rate, trial_seconds, seed=seed, verbose=False, full=full)
+        print(f"  {rate:>10,.0f} tx/s -> {result.achieved_rate:>10,.0f} tx/s "
+              f"({'sostenible' if result.is_sustainable() else 'no sostenible'})")
+        if result.is_sustainable():
+            good, rate = rate, rate * 2
+        else:
+            bad = rate
+    for _ in range(FIND_MAX_SEARCH_STEPS):
+        rate = (good + bad) / 2
+        result = run_load(rate, trial_seconds, seed=seed, verbose=False, full=full)
+        print(f"  {rate:>10,.0f} tx/s -> {result.achieved_rate:>10,.0f} tx/s "
+              f"({'sostenible' if result.is_sustainable() else 'no sostenible'})")
+        if result.is_sustainable():
+            good = rate
+        else:
+            bad = rate
+    return good
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para el pipeline de transacciones.")
+    parser.add_argument("--rate", type=float, default=1000, help="Ritmo objetivo en transacciones por segundo")
+    parser.add_argument("--duration", type=float, default=30, help="Duración en segundos")
+    parser.add_argument("--ramp", type=float, default=0, help="Segundos de rampa hasta el ritmo objetivo")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--find-max", action="store_true", help="Busca el máximo ritmo sostenible")
+    parser.add_argument("--trial-seconds", type=float, default=10, help="Duración de cada prueba de --find-max")
+    parser.add_argument("--full", action="store_true",
+                        help="Procesa con process_batch (salidas, journal e índices) en carpetas temporales")
+    args = parser.parse_args()
+
+    workspace = full_pipeline_workspace() if args.full else contextlib.nullcontext()
+    with workspace:
+        if args.find_max:
+            mode = "pipeline completo" if args.full else "solo etapas en memoria"
+            print(f"Buscando el máximo ritmo sostenible ({mode})...")
+            max_rate = find_max_rate(args.trial_seconds, seed=args.seed, full=args.full)
+            print(f"\nMáximo ritmo sostenible: {max_rate:,.0f} tx/s")
+            return
+
+        print(f"Generando carga a {args.rate:,.0f} tx/s durante {args.duration:.0f}s...")
+        run_load(args.rate, args.duration, args.ramp, args.seed, full=args.full).report()
+
+
+if __name__ == "__main__":
+    main()
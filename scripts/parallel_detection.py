@@ -0,0 +1,139 @@
+"""
+Detección de fraude en paralelo por shards de user_id.
+
+Las reglas por usuario (declinadas, transacciones rápidas, velocidad) son
+independientes entre usuarios, y las globales (percentiles de monto) solo
+necesitan un paso previo barato. El flujo es:
+
+1. El proceso principal extrae los arrays de las reglas (fraud_rules.rule_inputs)
+   y calcula los parámetros globales (fraud_rules.rule_params).
+2. Los arrays se copian una vez a memoria compartida
+   (multiprocessing.shared_memory). Los workers los mapean sin pickle.
+3. Cada worker toma las filas cuyo hash de user_id cae en su shard, evalúa
+   fraud_rules.evaluate_rules y escribe su parte del rule_mask compartido.
+   Los shards son disjuntos, así que no hay coordinación entre workers.
+4. El proceso principal separa el lote con la máscara. El resultado es idéntico
+   al de detect_suspicious_transactions().
+
+El pool de procesos se crea una vez (spawn) y se reutiliza entre lotes.
+"""
+
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from scripts.fraud_rules import evaluate_rules, rule_inputs, rule_params, split_by_mask
+
+
+# Configuración
+DEFAULT_WORKERS = os.cpu_count() or 1
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def shard_of(user_ids, n_shards):
+    """Shard de cada user_id (hash multiplicativo, estable entre procesos)."""
+    with np.errstate(over="ignore"):
+        hashed = user_ids.astype(np.uint64) * _HASH_MULTIPLIER
+    return ((hashed >> np.uint64(32)) % np.uint64(n_shards)).astype(np.int64)
+
+
+class SharedArrays:
+    """Copia un dict de arrays a bloques de memoria compartida (context manager)."""
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.specs = {}
+        self.arrays = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[:] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.dtype.str, array.shape)
+            self.arrays[name] = shared
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.arrays = {}
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+def _attach(specs):
+    blocks, arrays = [], {}
+    for name, (block_name, dtype, shape) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return blocks, arrays
+
+
+def _evaluate_shard(input_specs, output_spec, params, shard, n_shards):
+    """Worker: evalúa las reglas sobre las filas de un shard y escribe su parte del rule_mask."""
+    blocks, arrays = _attach({**input_specs, "rule_mask": output_spec})
+    try:
+        output = arrays.pop("rule_mask")
+        rows = np.flatnonzero(shard_of(arrays["user_id"], n_shards) == shard)
+        output[rows] = evaluate_rules({name: array[rows] for name, array in arrays.items()}, params)
+        return len(rows)
+    finally:
+        # Soltar las vistas antes de cerrar: un bloque con vistas vivas no se puede cerrar
+        arrays = output = None
+        for block in blocks:
+            block.close()
+
+
+class ParallelDetector:
+    """Pool de procesos reutilizable para evaluar las reglas por shards de user_id."""
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def rule_mask(self, df):
+        inputs = rule_inputs(df)
+        params = rule_params(df, inputs)
+        with SharedArrays(inputs) as shared_inputs, \
+                SharedArrays({"rule_mask": np.zeros(len(df), dtype=np.uint8)}) as shared_output:
+            futures = [
+                self.pool.submit(_evaluate_shard, shared_inputs.specs, shared_output.specs["rule_mask"],
+                                 params, shard, self.workers)
+                for shard in range(self.workers)
+            ]
+            for future in futures:
+                future.result()
+            return shared_output.arrays["rule_mask"].copy()
+
+    def detect(self, df):
+        """Mismo contrato que detect_suspicious_transactions(): (normal_df, suspicious_df)."""
+        return split_by_mask(df, self.rule_mask(df))
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+_parallel_detector = None
+
+
+def get_parallel_detector(workers=DEFAULT_WORKERS):
+    """Retorna el detector compartido del proceso (el pool se crea en el primer uso)."""
+    global _parallel_detector
+    if _parallel_detector is None or _parallel_detector.workers != workers:
+        if _parallel_detector is not None:
+            _parallel_detector.shutdown()
+        _parallel_detector = ParallelDetector(workers)
+        atexit.register(_parallel_detector.shutdown)
+    return _parallel_detector
+
+
+def detect_suspicious_parallel(df, workers=DEFAULT_WORKERS):
+    """Detección de fraude repartida en `workers` procesos por shards de user_id."""
+    return get_parallel_detector(workers).detect(df)
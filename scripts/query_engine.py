@@ -0,0 +1,233 @@
+"""
+Motor de consultas analíticas embebido sobre ./processed y ./suspicious (DuckDB).
+
+Permite responder preguntas como "monto sospechoso por país la semana pasada" sin
+cargar todos los archivos con pd.read_csv ni levantar PostgreSQL.
+
+- Las carpetas se exponen como las vistas `processed` y `suspicious`.
+- Solo se leen las columnas que usa la consulta (projection pushdown de DuckDB).
+- El rango de tiempo poda archivos compactados con el min/max de timestamp del
+  manifiesto (scripts/compact_files.py) y se empuja como filtro al escaneo de
+  Parquet (estadísticas por row group).
+- DuckDB procesa en streaming y en paralelo, por lo que escala a cientos de
+  millones de filas en un portátil.
+
+Uso (Python):
+    from scripts.query_engine import QueryEngine
+    engine = QueryEngine()
+    df = engine.query("SELECT country, SUM(amount_usd) FROM suspicious GROUP BY 1",
+                      start="2025-10-01", end="2025-10-08")
+
+Uso (CLI):
+    python -m scripts.query_engine "SELECT COUNT(*) FROM processed" --start 2025-10-01
+    python -m scripts.query_engine --preset suspicious_by_country --start 2025-10-01 --end 2025-10-08
+"""
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.compact_files import load_manifest, list_data_files
+from scripts.fraud_rules import RULES
+
+
+# Configuración
+DATASETS = {
+    "processed": Path("./processed"),
+    "suspicious": Path("./suspicious"),
+}
+# Columnas que las vistas siempre exponen (NULL si ningún archivo las tiene, p.ej. amount_usd
+# en archivos anteriores a la normalización de moneda)
+VIEW_COLUMNS = {
+    "transaction_id": "VARCHAR",
+    "user_id": "BIGINT",
+    "merchant_id": "BIGINT",
+    "amount": "DOUBLE",
+    "amount_usd": "DOUBLE",
+    "currency": "VARCHAR",
+    "status": "VARCHAR",
+    "timestamp": "TIMESTAMP",
+    "payment_method": "VARCHAR",
+    "country": "VARCHAR",
+    "response_message": "VARCHAR",
+    "rule_mask": "UTINYINT",
+    "risk_score": "UTINYINT",
+}
+
+PRESETS = {
+    "suspicious_by_country": """
+        SELECT country,
+               COUNT(*) AS transactions,
+               ROUND(SUM(COALESCE(amount_usd, amount)), 2) AS amount_usd
+        FROM suspicious
+        GROUP BY country
+        ORDER BY amount_usd DESC
+    """,
+    # Una fila por regla: se expande el bitmask sin volver a evaluar las reglas
+    "suspicious_by_rule": f"""
+        SELECT rules.rule,
+               COUNT(*) AS transactions,
+               ROUND(AVG(risk_score), 1) AS avg_risk_score,
+               ROUND(SUM(COALESCE(amount_usd, amount)), 2) AS amount_usd
+        FROM suspicious
+        JOIN (VALUES {", ".join(f"('{name}', {bit})" for name, (bit, _) in RULES.items())}) AS rules(rule, bit)
+          ON (rule_mask & rules.bit) <> 0
+        GROUP BY rules.rule
+        ORDER BY transactions DESC
+    """,
+    "daily_volume": """
+        SELECT CAST(timestamp AS DATE) AS day,
+               COUNT(*) AS transactions,
+               ROUND(SUM(COALESCE(amount_usd, amount)), 2) AS amount_usd
+        FROM processed
+        GROUP BY day
+        ORDER BY day
+    """,
+}
+
+
+def _sql_list(paths):
+    return "[" + ", ".join(f"'{str(p)}'" for p in paths) + "]"
+
+
+def _prune_by_time(folder, files, start, end):
+    """Descarta archivos compactados cuyo rango de timestamps no cruza [start, end)."""
+    if start is None and end is None:
+        return files
+    ranges = {
+        entry["file"]: (entry.get("min_timestamp"), entry.get("max_timestamp"))
+        for entry in load_manifest(folder)["files"]
+    }
+    kept = []
+    for path in files:
+        min_ts, max_ts = ranges.get(path.name, (None, None))
+        if min_ts is not None and end is not None and pd.Timestamp(min_ts) >= end:
+            continue
+        if max_ts is not None and start is not None and pd.Timestamp(max_ts) < start:
+            continue
+        kept.append(path)
+    return kept
+
+
+class QueryEngine:
+    """Vistas DuckDB sobre las carpetas de salida del pipeline."""
+
+    def __init__(self, datasets=None, threads=None, memory_limit=None):
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("Se requiere duckdb para el motor de consultas (pip install duckdb)")
+        self.datasets = {name: Path(folder) for name, folder in (datasets or DATASETS).items()}
+        self.connection = duckdb.connect()
+        if threads:
+            self.connection.execute(f"SET threads = {int(threads)}")
+        if memory_limit:
+            self.connection.execute(f"SET memory_limit = '{memory_limit}'")
+
+    def _source_sql(self, folder, start, end):
+        """SELECT que une los Parquet compactados y los CSV pendientes de una carpeta."""
+        files = _prune_by_time(folder, list_data_files(folder), start, end) if folder.exists() else []
+        parquet = [p for p in files if p.suffix == ".parquet"]
+        csv = [p for p in files if p.suffix == ".csv"]
+
+        parts = []
+        if parquet:
+            parts.append(f"SELECT * FROM read_parquet({_sql_list(parquet)}, union_by_name = true)")
+        if csv:
+            # En Parquet el timestamp ya es TIMESTAMP; el cast solo en los CSV mantiene el pushdown
+            parts.append(
+                f'SELECT * REPLACE (CAST("timestamp" AS TIMESTAMP) AS "timestamp") '
+                f"FROM read_csv({_sql_list(csv)}, header = true, union_by_name = true)"
+            )
+        if not parts:
+            columns = ", ".join(f"CAST(NULL AS {sql_type}) AS \"{name}\"" for name, sql_type in VIEW_COLUMNS.items())
+            return f"SELECT {columns} WHERE false"
+
+        source = " UNION ALL BY NAME ".join(parts)
+        # Esquema estable: las columnas que ningún archivo tiene se exponen como NULL
+        present = {row[0] for row in self.connection.execute(f"DESCRIBE {source}").fetchall()}
+        missing = [f"CAST(NULL AS {sql_type}) AS \"{name}\""
+                   for name, sql_type in VIEW_COLUMNS.items() if name not in present]
+        if missing:
+            source = f"SELECT *, {', '.join(missing)} FROM ({source})"
+
+        filters = []
+        if start is not None:
+            filters.append(f"timestamp >= TIMESTAMP '{start}'")
+        if end is not None:
+            filters.append(f"timestamp < TIMESTAMP '{end}'")
+        if filters:
+            source = f"SELECT * FROM ({source}) WHERE {' AND '.join(filters)}"
+        return source
+
+    def register_views(self, start=None, end=None):
+        """(Re)crea las vistas de cada carpeta con el rango de tiempo indicado."""
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        for name, folder in self.datasets.items():
+            self.connection.execute(f"CREATE OR REPLACE VIEW {name} AS {self._source_sql(folder, start, end)}")
+
+    def query(self, sql, start=None, end=None, params=None):
+        """
+        Ejecuta una consulta SQL sobre las vistas `processed` y `suspicious`.
+
+        Args:
+            sql (str): Consulta SQL (DuckDB)
+            start, end (str | datetime): Rango [start, end) sobre la columna timestamp
+            params (list): Parámetros posicionales de la consulta
+
+        Returns:
+            pd.DataFrame: Resultado
+        """
+        self.register_views(start, end)
+        return self.connection.execute(sql, params or []).df()
+
+    def explain(self, sql, start=None, end=None):
+        """Retorna el plan físico (útil para verificar el pushdown de columnas y filtros)."""
+        self.register_views(start, end)
+        return "\n".join(row[1] for row in self.connection.execute(f"EXPLAIN {sql}").fetchall())
+
+
+def suspicious_amount_by_country(start=None, end=None):
+    """Monto sospechoso (USD) por país en el rango [start, end)."""
+    return QueryEngine().query(PRESETS["suspicious_by_country"], start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas SQL sobre ./processed y ./suspicious.")
+    parser.add_argument("sql", nargs="?", help="Consulta SQL sobre las vistas processed / suspicious")
+    parser.add_argument("--preset", choices=list(PRESETS.keys()))
+    parser.add_argument("--start", help="Inicio del rango (inclusive), p.ej. 2025-10-01")
+    parser.add_argument("--end", help="Fin del rango (exclusivo), p.ej. 2025-10-08")
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--memory-limit", help="Límite de memoria de DuckDB, p.ej. 4GB")
+    parser.add_argument("--explain", action="store_true", help="Muestra el plan en lugar del resultado")
+    parser.add_argument("--output", help="Guarda el resultado en CSV")
+    args = parser.parse_args()
+
+    sql = PRESETS[args.preset] if args.preset else args.sql
+    if not sql:
+        parser.error("Indica una consulta SQL o --preset")
+
+    try:
+        engine = QueryEngine(threads=args.threads, memory_limit=args.memory_limit)
+    except ImportError as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    if args.explain:
+        print(engine.explain(sql, args.start, args.end))
+        return
+
+    result = engine.query(sql, args.start, args.end)
+    if args.output:
+        result.to_csv(args.output, index=False)
+        print(f"Resultado guardado en: {args.output}")
+    else:
+        with pd.option_context("display.max_rows", 200, "display.width", 200):
+            print(result)
+
+
+if __name__ == "__main__":
+    main()
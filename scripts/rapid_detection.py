@@ -0,0 +1,73 @@
+"""
+Detección vectorizada de transacciones rápidas (regla 4).
+
+La versión original ordenaba el DataFrame completo por (user_id, timestamp) y
+calculaba groupby().diff(). Marcaba solo la segunda transacción de cada par y no
+consideraba rápidas las transacciones con el mismo timestamp.
+
+Aquí se trabaja sobre arrays int64:
+
+1. Se arma una clave compuesta `user * span + (t - t_min)` (un solo int64), de
+   modo que un único argsort ordena por usuario y tiempo sin ordenar el
+   DataFrame. Si la clave no cabe en int64 se usa np.lexsort. No hace falta un
+   sort estable: las claves iguales (mismo usuario y mismo instante) se marcan
+   igual en cualquier orden, y el quicksort de NumPy (SIMD) es ~4x más rápido
+   que el estable sobre int64.
+2. En el orden resultante, dos vecinos del mismo usuario con diferencia
+   <= ventana forman un par rápido. Se marcan ambos lados del par, incluidas
+   las ráfagas dentro del mismo segundo (diferencia 0).
+
+Toda transacción con otra del mismo usuario dentro de la ventana tiene un
+vecino inmediato dentro de la ventana, así que comparar vecinos basta.
+"""
+
+import numpy as np
+
+
+# Configuración
+RAPID_WINDOW_SECONDS = 60
+_NAT = np.iinfo(np.int64).min
+
+
+def rapid_transaction_mask(user_ids, epochs, window):
+    """
+    Marca las transacciones que tienen otra del mismo usuario a <= `window` de distancia.
+
+    Args:
+        user_ids (np.ndarray): IDs de usuario enteros
+        epochs (np.ndarray): Tiempos int64 (cualquier unidad; NaT = int64 mínimo se ignora)
+        window (int): Ventana en la misma unidad que `epochs` (inclusive)
+
+    Returns:
+        np.ndarray: Máscara booleana alineada con la entrada
+    """
+    users = np.asarray(user_ids, dtype=np.int64)
+    times = np.asarray(epochs, dtype=np.int64)
+    mask = np.zeros(len(users), dtype=bool)
+
+    valid = np.flatnonzero(times != _NAT)
+    if len(valid) < 2:
+        return mask
+    users, times = users[valid], times[valid]
+
+    u_min, t_min = int(users.min()), int(times.min())
+    span = int(times.max()) - t_min + 1
+    if (int(users.max()) - u_min + 1) * span < 2 ** 63:
+        order = np.argsort((users - u_min) * span + (times - t_min))
+    else:
+        order = np.lexsort((times, users))
+
+    sorted_users, sorted_times = users[order], times[order]
+    close = (sorted_users[1:] == sorted_users[:-1]) & (sorted_times[1:] - sorted_times[:-1] <= window)
+    flagged = np.zeros(len(order), dtype=bool)
+    flagged[1:] |= close
+    flagged[:-1] |= close
+
+    mask[valid[order]] = flagged
+    return mask
+
+
+def rapid_transactions(df, window_seconds=RAPID_WINDOW_SECONDS):
+    """Aplica rapid_transaction_mask sobre un lote (user_id, timestamp datetime)."""
+    epochs_ms = df['timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+    return rapid_transaction_mask(df['user_id'].to_numpy(), epochs_ms, window_seconds * 1000)
@@ -0,0 +1,146 @@
+"""
+Cache binario de los datos de referencia en archivos .npy mapeados en memoria.
+
+Parsear users.csv, companies.csv y payment_methods.csv domina el arranque cuando
+los archivos crecen (10M usuarios). Este módulo guarda el resultado de ese
+trabajo como columnas NumPy (.npy) en data/.cache/ y las abre con
+np.load(mmap_mode='r'):
+
+- El arranque es casi instantáneo: no se parsea texto ni se copian datos.
+- Varios procesos del pipeline comparten las mismas páginas del page cache
+  (zero-copy), en lugar de tener cada uno su copia en memoria.
+- Las columnas de texto se guardan como códigos enteros más un array de
+  categorías de tipo unicode, así que todo se guarda sin pickle.
+
+El cache se invalida cuando cambia algún archivo fuente. La comprobación rápida
+usa mtime y tamaño; si difieren se calcula el sha256 y solo se reconstruye si el
+contenido cambió (tocar un archivo no invalida el cache).
+
+Cada reconstrucción se escribe en un directorio nuevo y el meta.json (escrito de
+forma atómica) es el punto de commit, así que un proceso nunca lee un cache a
+medio escribir. La versión reemplazada queda registrada en meta.json y se borra
+en una reconstrucción posterior, pasados RETIRED_GRACE_SECONDS: un proceso que
+leyó el meta.json anterior todavía puede abrir sus archivos.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from scripts.io_utils import atomic_write_json, fsync_directory
+
+
+# Configuración
+CACHE_FOLDER = Path("./data/.cache")
+META_FILE = "meta.json"
+HASH_CHUNK_BYTES = 1 << 20
+RETIRED_GRACE_SECONDS = 120  # Una versión reemplazada se borra recién pasado este margen
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint(path, sha256=None):
+    stat = os.stat(path)
+    return {"path": str(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+            "sha256": sha256 or _sha256(path)}
+
+
+def _load_meta(folder):
+    meta_path = folder / META_FILE
+    if not meta_path.exists():
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _is_fresh(folder, meta, sources):
+    """Valida el cache contra las fuentes; actualiza los mtime si solo cambió el mtime."""
+    if meta is None or [s["path"] for s in meta["sources"]] != [str(p) for p in sources]:
+        return False
+    touched = False
+    for cached, path in zip(meta["sources"], sources):
+        stat = os.stat(path)
+        if stat.st_mtime_ns == cached["mtime_ns"] and stat.st_size == cached["size"]:
+            continue
+        if stat.st_size != cached["size"] or _sha256(path) != cached["sha256"]:
+            return False
+        cached["mtime_ns"] = stat.st_mtime_ns
+        touched = True
+    if touched:
+        atomic_write_json(meta, folder / META_FILE)
+    return True
+
+
+def _open_arrays(folder, meta):
+    version = folder / meta["version"]
+    return {name: np.load(version / f"{name}.npy", mmap_mode="r") for name in meta["arrays"]}
+
+
+def _write_arrays(folder, sources, arrays, info):
+    """Escribe una versión nueva del cache y la confirma en meta.json."""
+    version = f"v{os.getpid()}_{os.urandom(4).hex()}"
+    version_dir = folder / version
+    version_dir.mkdir(parents=True)
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        if array.dtype == object:
+            array = array.astype(str)  # Sin pickle: las categorías se guardan como unicode
+        with open(version_dir / f"{name}.npy", "wb") as f:
+            np.save(f, array)
+            f.flush()
+            os.fsync(f.fileno())
+    fsync_directory(version_dir)
+
+    previous = _load_meta(folder)
+    now = time.time()
+    retired = previous.get("retired", []) if previous else []
+    if previous:
+        retired.append({"version": previous["version"], "retired_at": now})
+    expired = [entry for entry in retired if now - entry["retired_at"] > RETIRED_GRACE_SECONDS]
+    meta = {
+        "version": version,
+        "sources": [_fingerprint(path) for path in sources],
+        "arrays": list(arrays),
+        "info": info,
+        "retired": [entry for entry in retired if entry not in expired],
+    }
+    atomic_write_json(meta, folder / META_FILE)
+    # Solo se borran versiones reemplazadas hace más del margen: quien leyó el meta.json
+    # anterior ya las abrió, y los mapeos abiertos conservan sus páginas hasta cerrarlas
+    for entry in expired:
+        shutil.rmtree(folder / entry["version"], ignore_errors=True)
+    return meta
+
+
+def cached_arrays(name, sources, build_fn, cache_folder=CACHE_FOLDER):
+    """
+    Retorna arrays mapeados en memoria derivados de `sources`, reconstruyéndolos si cambiaron.
+
+    Args:
+        name (str): Nombre del cache (subcarpeta de cache_folder)
+        sources (list[Path]): Archivos fuente que invalidan el cache
+        build_fn (callable): Sin argumentos; retorna (dict[str, np.ndarray], dict info)
+        cache_folder (Path): Carpeta raíz del cache
+
+    Returns:
+        tuple: (dict[str, np.ndarray] de solo lectura, dict info)
+    """
+    folder = Path(cache_folder) / name
+    sources = [Path(p) for p in sources]
+    meta = _load_meta(folder)
+    if not _is_fresh(folder, meta, sources):
+        folder.mkdir(parents=True, exist_ok=True)
+        arrays, info = build_fn()
+        meta = _write_arrays(folder, sources, arrays, info)
+    return _open_arrays(folder, meta), meta["info"]
@@ -0,0 +1,358 @@
+"""
+Sketches aproximados y combinables para monitoreo en tiempo real.
+
+Preguntas como "usuarios distintos por comercio en el último minuto" o "comercios
+con más volumen sospechoso en la última hora" requerían un groupby exacto sobre
+todo el historial (./suspicious o fact_transactions). process_batch() actualiza
+estos sketches con cada lote y se responden desde memoria:
+
+- HyperLogLogSketch: cardinalidad distinta por clave (usuarios por comercio y por
+  país). Error relativo ~1.04 / sqrt(2^HLL_PRECISION) (~3% con precisión 10).
+  Guarda solo los registros no nulos como celdas (clave, registro) ordenadas, así
+  que una clave con pocos usuarios ocupa pocos bytes. Nunca ocupa más que el HLL
+  denso.
+- HeavyHitters: Count-Min (CMS_DEPTH x CMS_WIDTH) con los TOP_K candidatos de
+  mayor peso (volumen sospechoso por comercio, sospechosas por usuario). El
+  Count-Min sobreestima como máximo en e / CMS_WIDTH del peso total con
+  probabilidad 1 - e^-CMS_DEPTH.
+
+Los sketches se guardan por bucket de BUCKET_SECONDS según el timestamp de la
+transacción. Se combinan bucket a bucket para cualquier rango: máximo de registros en
+HLL, suma de tablas en Count-Min y unión de candidatos. Se conservan
+RETENTION_BUCKETS buckets, así que la memoria está acotada. Cada bucket se persiste
+en ./sketches/<bucket>.npz.
+
+Uso:
+    python -m scripts.sketches --minutes 60
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scripts.hashing import splitmix64
+from scripts.io_utils import atomic_write
+from scripts.transaction_schema import COUNTRIES, COUNTRY_DTYPE, to_fixed_categorical
+
+
+# Configuración
+SKETCH_FOLDER = Path("./sketches")
+BUCKET_SECONDS = 60
+RETENTION_BUCKETS = 24 * 60  # Un día de buckets de 1 minuto
+HLL_PRECISION = 10  # 2^10 registros por clave
+CMS_WIDTH = 512  # ~16 KB por sketch y bucket con CMS_DEPTH = 4
+CMS_DEPTH = 4
+TOP_K = 50  # Candidatos a heavy hitter por sketch
+
+# Métrica -> (columna clave, columna valor) para HLL y (columna clave, columna peso) para heavy hitters
+DISTINCT_METRICS = {
+    "distinct_users_by_merchant": ("merchant_id", "user_id"),
+    "distinct_users_by_country": ("country", "user_id"),
+}
+HEAVY_HITTER_METRICS = {
+    "suspicious_volume_by_merchant": ("merchant_id", "amount_usd"),
+    "suspicious_count_by_user": ("user_id", None),  # Peso 1 por transacción
+}
+
+_POWERS_OF_TWO = np.uint64(1) << np.arange(64, dtype=np.uint64)
+
+
+def _bit_length(values):
+    """Cantidad de bits significativos de cada uint64 (0 para 0), exacta y vectorizada."""
+    return np.searchsorted(_POWERS_OF_TWO, values, side="right")
+
+
+def _max_per_cell(cells, ranks):
+    """Deja una entrada por celda con el rango máximo (cells queda ordenado)."""
+    order = np.lexsort((ranks, cells))
+    cells, ranks = cells[order], ranks[order]
+    last = np.r_[cells[1:] != cells[:-1], True] if len(cells) else np.zeros(0, dtype=bool)
+    return cells[last], ranks[last]
+
+
+class HyperLogLogSketch:
+    """HyperLogLog por clave en representación dispersa (celda = clave << p | registro)."""
+
+    def __init__(self, precision=HLL_PRECISION, cells=None, ranks=None):
+        self.precision = precision
+        self.cells = cells if cells is not None else np.zeros(0, dtype=np.uint64)
+        self.ranks = ranks if ranks is not None else np.zeros(0, dtype=np.uint8)
+
+    def update(self, keys, values):
+        """Agrega los valores (int64) al conjunto de cada clave (int64 no negativa)."""
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.asarray(values, dtype=np.int64)
+        valid = keys >= 0  # Código -1: país fuera del diccionario
+        keys, values = keys[valid], values[valid]
+        if len(keys) == 0:
+            return
+        p = np.uint64(self.precision)
+        hashes = splitmix64(values.view(np.uint64))
+        register = hashes >> (np.uint64(64) - p)
+        rest = hashes & ((np.uint64(1) << (np.uint64(64) - p)) - np.uint64(1))
+        # Rango = posición del primer 1 en los 64 - p bits restantes
+        ranks = (64 - self.precision - _bit_length(rest) + 1).astype(np.uint8)
+        cells = (keys.astype(np.uint64) << p) | register
+        self.cells, self.ranks = _max_per_cell(np.r_[self.cells, cells], np.r_[self.ranks, ranks])
+
+    def merge(self, other):
+        self.cells, self.ranks = _max_per_cell(np.r_[self.cells, other.cells], np.r_[self.ranks, other.ranks])
+
+    @classmethod
+    def combine(cls, sketches):
+        """Unión de varios sketches en una sola pasada (un solo ordenamiento)."""
+        sketches = list(sketches)
+        if not sketches:
+            return cls()
+        cells, ranks = _max_per_cell(np.concatenate([s.cells for s in sketches]),
+                                     np.concatenate([s.ranks for s in sketches]))
+        return cls(precision=sketches[0].precision, cells=cells, ranks=ranks)
+
+    def estimates(self):
+        """
+        Cardinalidad estimada de cada clave presente.
+
+        Returns:
+            pd.Series: Estimación indexada por clave
+        """
+        m = 1 << self.precision
+        keys, positions = np.unique(self.cells >> np.uint64(self.precision), return_inverse=True)
+        registers = np.zeros((len(keys), m), dtype=np.uint8)
+        registers[positions, (self.cells & np.uint64(m - 1)).astype(np.int64)] = self.ranks
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.exp2(-registers.astype(float)).sum(axis=1)
+        zeros = (registers == 0).sum(axis=1)
+        # Corrección para cardinalidades chicas (linear counting)
+        small = (raw <= 2.5 * m) & (zeros > 0)
+        raw[small] = m * np.log(m / zeros[small])
+        return pd.Series(raw, index=keys.astype(np.int64))
+
+    def to_arrays(self, prefix):
+        return {f"{prefix}__cells": self.cells, f"{prefix}__ranks": self.ranks}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(cells=arrays[f"{prefix}__cells"], ranks=arrays[f"{prefix}__ranks"])
+
+
+class HeavyHitters:
+    """Count-Min con los TOP_K candidatos de mayor peso estimado."""
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH, k=TOP_K, table=None, candidates=None):
+        self.width = width
+        self.depth = depth
+        self.k = k
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.float64)
+        self.candidates = candidates if candidates is not None else np.zeros(0, dtype=np.int64)
+
+    def _columns(self, keys):
+        h1 = splitmix64(keys.view(np.uint64))
+        h2 = splitmix64(h1) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            return ((h1[None, :] + rows[:, None] * h2[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def query(self, keys):
+        """Peso estimado de cada clave (nunca menor al real)."""
+        keys = np.asarray(keys, dtype=np.int64)
+        columns = self._columns(keys)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def _keep_top(self, keys):
+        keys = np.unique(keys)
+        if len(keys) > self.k:
+            keys = keys[np.argsort(-self.query(keys), kind="stable")[:self.k]]
+        self.candidates = np.sort(keys)
+
+    def update(self, keys, weights):
+        if len(keys) == 0:
+            return
+        keys = np.asarray(keys, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        columns = self._columns(keys)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], weights=weights, minlength=self.width)
+        self._keep_top(np.r_[self.candidates, keys])
+
+    def merge(self, other):
+        self.table = self.table + other.table
+        self._keep_top(np.r_[self.candidates, other.candidates])
+
+    @classmethod
+    def combine(cls, sketches):
+        """Suma de tablas y unión de candidatos de varios sketches."""
+        sketches = list(sketches)
+        if not sketches:
+            return cls()
+        first = sketches[0]
+        result = cls(width=first.width, depth=first.depth, k=first.k,
+                     table=np.sum([s.table for s in sketches], axis=0))
+        result._keep_top(np.concatenate([s.candidates for s in sketches]))
+        return result
+
+    def top(self, n=10):
+        """
+        Las n claves de mayor peso estimado.
+
+        Returns:
+            pd.Series: Peso estimado indexado por clave, de mayor a menor
+        """
+        estimates = pd.Series(self.query(self.candidates), index=self.candidates)
+        return estimates.sort_values(ascending=False, kind="stable").head(n)
+
+    def to_arrays(self, prefix):
+        return {f"{prefix}__table": self.table, f"{prefix}__candidates": self.candidates}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        table = arrays[f"{prefix}__table"]
+        return cls(width=table.shape[1], depth=table.shape[0], table=table, candidates=arrays[f"{prefix}__candidates"])
+
+
+def _empty_bucket():
+    bucket = {metric: HyperLogLogSketch() for metric in DISTINCT_METRICS}
+    bucket.update({metric: HeavyHitters() for metric in HEAVY_HITTER_METRICS})
+    return bucket
+
+
+def _column(df, column):
+    """Columna como int64 (códigos para country) o float64 para pesos."""
+    if column == "country":
+        return to_fixed_categorical(df[column], COUNTRY_DTYPE).cat.codes.to_numpy().astype(np.int64)
+    if column == "amount_usd":
+        source = "amount_usd" if "amount_usd" in df.columns else "amount"
+        return np.nan_to_num(df[source].to_numpy(dtype=float))
+    return df[column].to_numpy(dtype=np.int64)
+
+
+class SketchStore:
+    """Sketches por bucket de tiempo, con persistencia y retención acotada."""
+
+    def __init__(self, folder=SKETCH_FOLDER, bucket_seconds=BUCKET_SECONDS, retention_buckets=RETENTION_BUCKETS):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.bucket_seconds = bucket_seconds
+        self.retention_buckets = retention_buckets
+        self.buckets = {}  # bucket (epoch // bucket_seconds) -> {métrica: sketch}
+        self._dirty = set()
+        self._load()
+
+    def _load(self):
+        for path in sorted(self.folder.glob("*.npz")):
+            with np.load(path) as arrays:
+                bucket = {metric: HyperLogLogSketch.from_arrays(arrays, metric) for metric in DISTINCT_METRICS}
+                bucket.update({metric: HeavyHitters.from_arrays(arrays, metric) for metric in HEAVY_HITTER_METRICS})
+            self.buckets[int(path.stem)] = bucket
+        self._expire()
+
+    def _parts(self, df):
+        """Divide el lote por bucket: un lote cae en pocos buckets, se itera por bucket y no por fila."""
+        if df.empty:
+            return
+        epochs = df["timestamp"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+        bucket_ids = epochs // self.bucket_seconds
+        for bucket_id in np.unique(bucket_ids):
+            bucket_id = int(bucket_id)
+            if bucket_id not in self.buckets:
+                self.buckets[bucket_id] = _empty_bucket()
+            self._dirty.add(bucket_id)
+            yield self.buckets[bucket_id], df[bucket_ids == bucket_id]
+
+    def update(self, df, df_suspicious):
+        """
+        Agrega un lote: HLL con todas las transacciones limpias y heavy hitters con las sospechosas.
+
+        Args:
+            df (pd.DataFrame): Transacciones limpias del lote (normales y sospechosas)
+            df_suspicious (pd.DataFrame): Transacciones sospechosas del lote
+        """
+        for bucket, part in self._parts(df):
+            for metric, (key, value) in DISTINCT_METRICS.items():
+                bucket[metric].update(_column(part, key), _column(part, value))
+        for bucket, part in self._parts(df_suspicious):
+            for metric, (key, weight) in HEAVY_HITTER_METRICS.items():
+                weights = _column(part, weight) if weight else np.ones(len(part))
+                bucket[metric].update(_column(part, key), weights)
+        self._expire()
+
+    def _expire(self):
+        if not self.buckets:
+            return
+        oldest = max(self.buckets) - self.retention_buckets + 1
+        for bucket_id in [b for b in self.buckets if b < oldest]:
+            del self.buckets[bucket_id]
+            self._dirty.discard(bucket_id)
+            (self.folder / f"{bucket_id}.npz").unlink(missing_ok=True)
+
+    def save(self):
+        """Persiste los buckets modificados desde el último save()."""
+        for bucket_id in sorted(self._dirty):
+            arrays = {}
+            for metric, sketch in self.buckets[bucket_id].items():
+                arrays.update(sketch.to_arrays(metric))
+
+            def _write(tmp, arrays=arrays):
+                with open(tmp, "wb") as f:
+                    np.savez(f, **arrays)
+            atomic_write(self.folder / f"{bucket_id}.npz", _write)
+        self._dirty.clear()
+
+    def merged(self, metric, start=None, end=None):
+        """Sketch combinado de los buckets con timestamp en [start, end)."""
+        first = None if start is None else pd.Timestamp(start).timestamp() // self.bucket_seconds
+        last = None if end is None else pd.Timestamp(end).timestamp() / self.bucket_seconds
+        sketch_class = HyperLogLogSketch if metric in DISTINCT_METRICS else HeavyHitters
+        return sketch_class.combine(
+            bucket[metric] for bucket_id, bucket in self.buckets.items()
+            if (first is None or bucket_id >= first) and (last is None or bucket_id < last)
+        )
+
+    def distinct(self, metric, start=None, end=None):
+        """Cardinalidad estimada por clave en el rango (ej. usuarios distintos por comercio)."""
+        estimates = self.merged(metric, start, end).estimates()
+        if DISTINCT_METRICS[metric][0] == "country":
+            estimates.index = [COUNTRIES[code] if 0 <= code < len(COUNTRIES) else None for code in estimates.index]
+        return estimates
+
+    def heavy_hitters(self, metric, start=None, end=None, n=10):
+        """Las n claves de mayor peso estimado en el rango."""
+        return self.merged(metric, start, end).top(n)
+
+
+_sketch_store = None
+
+
+def get_sketch_store():
+    """Retorna el SketchStore compartido del proceso (se carga desde disco en el primer uso)."""
+    global _sketch_store
+    if _sketch_store is None:
+        _sketch_store = SketchStore()
+    return _sketch_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas sobre los sketches de monitoreo.")
+    parser.add_argument("--minutes", type=int, default=60, help="Rango hacia atrás desde el último bucket")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    store = get_sketch_store()
+    if not store.buckets:
+        print(f"No hay sketches en {store.folder}")
+        return
+    end = pd.Timestamp((max(store.buckets) + 1) * store.bucket_seconds, unit="s")
+    start = end - pd.Timedelta(minutes=args.minutes)
+    print(f"Rango: {start} a {end}")
+    print("\nUsuarios distintos por país:")
+    print(store.distinct("distinct_users_by_country", start, end).round().astype(int).to_string())
+    print("\nComercios con más usuarios distintos:")
+    print(store.distinct("distinct_users_by_merchant", start, end).nlargest(args.top).round().astype(int).to_string())
+    for metric in HEAVY_HITTER_METRICS:
+        print(f"\nTop {args.top} {metric}:")
+        print(store.heavy_hitters(metric, start, end, args.top).round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
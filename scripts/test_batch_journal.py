@@ -0,0 +1,89 @@
+# scripts/test_batch_journal.py
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Agrega la raíz del proyecto al path para importar main.py
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+# Todo corre en un directorio temporal: el journal y las carpetas del pipeline son rutas relativas
+workspace = Path(tempfile.mkdtemp(prefix="test_batch_journal_"))
+os.symlink(ROOT / "data", workspace / "data")
+os.chdir(workspace)
+
+import main
+from scripts.batch_journal import JOURNAL_FILE, MAX_ATTEMPTS, BatchJournal, output_name
+from scripts.generate_transactions import GeneratorConfig, generate_transactions_fast
+from scripts.io_utils import atomic_write_csv
+
+# Reconstrucción del estado desde el archivo (sin pasar por main)
+journal_path = workspace / "solo_journal" / "batches.jsonl"
+journal = BatchJournal(journal_path)
+journal.begin("transactions/transactions_a.csv", last_id=100)
+journal.begin("transactions/transactions_b.csv", last_id=200)
+journal.begin("transactions/transactions_c.csv", last_id=300)
+journal.fail("transactions/transactions_b.csv", RuntimeError("boom"))
+journal.commit("transactions/transactions_c.csv", 100, [])
+with open(journal_path, "a", encoding="utf-8") as f:
+    f.write('{"raw_file": "transactions/transactions_d.csv", "sta')  # Caída a mitad del append
+
+reloaded = BatchJournal(journal_path)
+pending = {entry["raw_file"]: entry for entry in reloaded.pending()}
+assert set(pending) == {"transactions/transactions_a.csv", "transactions/transactions_b.csv"}
+assert pending["transactions/transactions_b.csv"]["status"] == "failed"
+assert pending["transactions/transactions_b.csv"]["attempts"] == 1
+assert reloaded.last_id == 300
+print("OK: al recargar quedan pendientes y fallidos; la línea truncada se ignora")
+
+# Un lote que agota los reintentos sale de la recuperación
+for _ in range(MAX_ATTEMPTS - 1):
+    reloaded.fail("transactions/transactions_b.csv", RuntimeError("boom"))
+assert [entry["raw_file"] for entry in BatchJournal(journal_path).pending()] == ["transactions/transactions_a.csv"]
+print(f"OK: tras {MAX_ATTEMPTS} intentos fallidos el lote no se recupera")
+
+# La compactación conserva los pendientes y la secuencia de IDs
+reloaded.compact()
+compacted = BatchJournal(journal_path)
+assert [entry["raw_file"] for entry in compacted.pending()] == ["transactions/transactions_a.csv"]
+assert compacted.last_id == 300
+print("OK: la compactación conserva pendientes y last_id")
+
+# Recuperación de main.py: un lote pendiente con su crudo, uno sin crudo y uno que falla
+main.setup_folders()
+config = GeneratorConfig(start_id=1)
+good_file = main.TRANSACTIONS_FOLDER / "transactions_20251001_000000_000001.csv"
+atomic_write_csv(generate_transactions_fast(100, config), good_file)
+missing_file = main.TRANSACTIONS_FOLDER / "transactions_20251001_000000_000002.csv"
+broken_file = main.TRANSACTIONS_FOLDER / "transactions_20251001_000000_000003.csv"
+broken_file.write_text("transaction_id,amount\n")  # Sin filas ni columnas críticas
+
+previous_run = BatchJournal(JOURNAL_FILE)
+previous_run.begin(good_file, last_id=config.next_id - 1)
+previous_run.begin(missing_file)
+previous_run.begin(broken_file)
+
+main.recover_pending_batches()
+journal = main.get_batch_journal()
+assert [entry["raw_file"] for entry in journal.pending()] == [str(broken_file)]
+with open(JOURNAL_FILE, encoding="utf-8") as f:
+    committed = [json.loads(line) for line in f if '"committed"' in line]
+assert [record["raw_file"] for record in committed] == [str(good_file)]
+assert committed[0]["offset"] == 100 and committed[0]["outputs"]
+assert all(Path(output).exists() for output in committed[0]["outputs"])
+assert all(Path(output).name == output_name(good_file, Path(output).parent.name) for output in committed[0]["outputs"])
+assert journal.last_id == config.next_id - 1
+print("OK: la recuperación procesa el pendiente, cierra el faltante y deja el fallido pendiente")
+
+for _ in range(MAX_ATTEMPTS - 1):
+    main.recover_pending_batches()
+assert main.get_batch_journal().pending() == []
+assert BatchJournal(JOURNAL_FILE).pending() == []
+print("OK: el lote que siempre falla deja de recuperarse tras MAX_ATTEMPTS")
+
+# Un reinicio continúa la secuencia de IDs del journal
+assert main.build_generator_config().next_id == config.next_id
+print("OK: el generador continúa desde el último ID registrado")
@@ -0,0 +1,109 @@
+# scripts/test_compact_files.py
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Agrega la raíz del proyecto al path para importar scripts/
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from scripts import compact_files
+from scripts.batch_journal import BatchJournal, output_name
+from scripts.compact_files import LOCK_NAME, compact_folder, list_data_files, load_manifest
+
+NOW = datetime(2025, 10, 1, 12, 30)  # Las ventanas de las 10 y las 11 ya cerraron
+
+
+def escribir_lote(folder, prefix, stamp, rows=3):
+    """CSV de lote con `rows` filas; stamp sigue el formato de main.py (%Y%m%d_%H%M%S_%f)."""
+    path = Path(folder) / f"{prefix}_{stamp}.csv"
+    pd.DataFrame({
+        "transaction_id": range(rows),
+        "amount": ["10.5"] * rows,
+        "timestamp": [f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:8]} {stamp[9:11]}:00:00"] * rows,
+    }).to_csv(path, index=False)
+    return path
+
+
+def filas(folder):
+    """Total de filas visibles según list_data_files()."""
+    return sum(len(pd.read_parquet(p) if p.suffix == ".parquet" else pd.read_csv(p)) for p in list_data_files(folder))
+
+
+def compactado(name):
+    """Primer archivo compactado de una carpeta de FOLDERS."""
+    folder = compact_files.FOLDERS[name]
+    return pd.read_parquet(folder / load_manifest(folder)["files"][0]["file"])
+
+
+# Compactación normal: la ventana de las 10 se fusiona; la de las 11 tiene un solo archivo
+folder = Path(tempfile.mkdtemp(prefix="compact_"))
+sources = [escribir_lote(folder, "processed", f"20251001_10{m:02d}00_000000") for m in (0, 1, 2)]
+escribir_lote(folder, "processed", "20251001_110000_000000")
+assert compact_folder(folder, now=NOW) == 1
+manifest = load_manifest(folder)
+assert [entry["file"] for entry in manifest["files"]] == ["processed_20251001_10_part000.parquet"]
+assert manifest["files"][0]["sources"] == [p.name for p in sources]
+assert manifest["files"][0]["rows"] == 9
+assert not any(p.exists() for p in sources)
+assert [p.name for p in list_data_files(folder)] == [
+    "processed_20251001_10_part000.parquet", "processed_20251001_110000_000000.csv"]
+assert filas(folder) == 12
+print("OK: la ventana cerrada se compacta y el manifiesto registra sus archivos de origen")
+
+# Caída después del commit del manifiesto, antes de borrar los CSV de origen
+for path in sources:
+    escribir_lote(folder, "processed", path.stem.split("_", 1)[1])
+assert filas(folder) == 12, "Los CSV ya compactados no deben verse dos veces"
+compact_folder(folder, now=NOW)
+assert not any(p.exists() for p in sources)
+print("OK: los CSV listados en el manifiesto se ignoran y la siguiente corrida los borra")
+
+# Caída después de escribir el Parquet, antes del commit del manifiesto
+late = [escribir_lote(folder, "processed", f"20251001_11{m:02d}00_000000") for m in (10, 20)]
+orphan = folder / "processed_20251001_11_part000.parquet"
+pd.read_csv(late[0]).to_parquet(orphan, index=False)
+assert orphan not in list_data_files(folder), "Un Parquet sin commit no debe ser visible"
+assert filas(folder) == 18
+assert compact_folder(folder, now=NOW) == 1
+assert [entry["file"] for entry in load_manifest(folder)["files"]] == [
+    "processed_20251001_10_part000.parquet", "processed_20251001_11_part000.parquet"]
+assert load_manifest(folder)["files"][1]["rows"] == 9
+assert filas(folder) == 18
+print("OK: el Parquet huérfano se descarta y la ventana se compacta de nuevo")
+
+# Lock tomado por otra compactación: no se toca nada
+escribir_lote(folder, "processed", "20251001_090000_000000")
+escribir_lote(folder, "processed", "20251001_093000_000000")
+(folder / LOCK_NAME).write_text("12345")
+assert compact_folder(folder, now=NOW) == 0
+(folder / LOCK_NAME).unlink()
+print("OK: con el lock tomado la compactación se omite")
+
+# main(): los lotes pendientes del journal no se compactan en ninguna carpeta
+workspace = Path(tempfile.mkdtemp(prefix="compact_main_"))
+os.chdir(workspace)
+pending_raw = Path("transactions") / "transactions_20251001_100500_000000.csv"
+for name in compact_files.FOLDERS:
+    Path(name).mkdir()
+    for stamp in ("20251001_100000_000000", "20251001_100500_000000", "20251001_101000_000000"):
+        escribir_lote(name, name, stamp)
+BatchJournal().begin(pending_raw)
+sys.argv = ["compact_files", "--window", "hour"]
+compact_files.main()
+for name, folder in compact_files.FOLDERS.items():
+    remaining = [p.name for p in folder.glob("*.csv")]
+    assert remaining == [output_name(pending_raw, name)], (name, remaining)
+    assert load_manifest(folder)["files"][0]["rows"] == 6
+print("OK: el crudo y las salidas de un lote pendiente quedan fuera de la compactación")
+
+# ./rejected se compacta como texto; las demás carpetas con tipos
+assert compactado("rejected")["amount"].tolist() == ["10.5"] * 6
+assert pd.api.types.is_string_dtype(compactado("rejected")["timestamp"])
+assert compactado("processed")["amount"].tolist() == [10.5] * 6
+assert pd.api.types.is_datetime64_any_dtype(compactado("processed")["timestamp"])
+print("OK: las filas rechazadas se conservan como texto")
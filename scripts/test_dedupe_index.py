@@ -0,0 +1,65 @@
+# scripts/test_dedupe_index.py
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Agrega la raíz del proyecto al path para importar scripts/
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from scripts.dedupe_index import DedupeIndex
+
+folder = Path(tempfile.mkdtemp(prefix="dedupe_index_"))
+WINDOW = 3
+
+
+def lote(n):
+    """IDs del lote n: 1000 IDs consecutivos que no se cruzan con otros lotes."""
+    return np.arange(n * 1000, n * 1000 + 1000, dtype=np.int64)
+
+
+index = DedupeIndex(folder, window_batches=WINDOW)
+assert not index.seen(lote(1)).any()
+index.add(lote(1))
+index.add(lote(2))
+index.save()
+
+# Un índice nuevo sobre la misma carpeta (reinicio) ve los lotes anteriores
+index = DedupeIndex(folder, window_batches=WINDOW)
+mask = index.seen(np.array([1000, 1999, 2500, 3000], dtype=np.int64))
+assert mask.tolist() == [True, True, True, False], mask
+assert sorted(p.name for p in folder.glob("recent_*.npy")) == ["recent_0000000001.npy", "recent_0000000002.npy"]
+print("OK: los IDs de lotes anteriores se detectan después de recargar desde disco")
+
+# Los lotes que salen de la ventana pasan al Bloom filter y su archivo se borra
+for n in range(3, 7):
+    index.add(lote(n))
+index.save()
+assert [seq for seq, _ in index.recent] == [4, 5, 6]
+assert sorted(p.name for p in folder.glob("recent_*.npy")) == [
+    "recent_0000000004.npy", "recent_0000000005.npy", "recent_0000000006.npy"]
+index = DedupeIndex(folder, window_batches=WINDOW)
+all_ids = np.concatenate([lote(n) for n in range(1, 7)])
+assert index.seen(all_ids).all(), "El Bloom filter no puede tener falsos negativos"
+print("OK: los lotes expirados siguen detectándose vía Bloom filter tras recargar")
+
+# IDs nunca vistos: sin falsos positivos en la ventana, muy pocos en el Bloom
+never_seen = np.arange(10_000_000, 10_100_000, dtype=np.int64)
+false_positives = int(index.seen(never_seen).sum())
+assert false_positives <= 5, false_positives
+print(f"OK: {false_positives} falsos positivos en {len(never_seen):,} IDs nunca vistos")
+
+# Un save() interrumpido antes de meta.json: el lote huérfano se descarta al cargar
+np.save(folder / "recent_0000000007.npy", lote(7))
+index = DedupeIndex(folder, window_batches=WINDOW)
+assert index.batch_seq == 6
+assert not (folder / "recent_0000000007.npy").exists()
+assert not index.seen(lote(7)[:100]).any()
+print("OK: un lote escrito sin commit en meta.json no se considera visto")
+
+# Repetidos dentro del mismo add() se registran una sola vez
+index.add(np.array([42, 42, 7], dtype=np.int64))
+assert index.recent[-1][1].tolist() == [7, 42]
+print("OK: add() guarda los IDs del lote ordenados y sin repetir")
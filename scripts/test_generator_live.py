@@ -0,0 +1,31 @@
+# scripts/test_generator_live.py
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+
+# Agrega la raíz del proyecto al path para importar main.py
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import main
+from scripts.generate_transactions import generate_transactions_fast
+
+# Intervalo corto para simular varios lotes del loop en pocos segundos
+main.INTERVAL_SECONDS = 2
+BATCHES = 3
+
+config = main.build_generator_config()
+print(f"start_time: {config.start_time}, batch_seconds: {config.batch_seconds}")
+
+for batch_count in range(1, BATCHES + 1):
+    # Igual que main(): el lote #N usa la ventana N - 1
+    df = generate_transactions_fast(100, config, batch_count - 1)
+    now = datetime.now()
+    latest = pd.to_datetime(df['timestamp']).max()
+    print(f"Lote #{batch_count}: último timestamp {latest}, ahora {now:%Y-%m-%d %H:%M:%S}")
+    assert latest <= now, f"El lote #{batch_count} tiene timestamps en el futuro"
+    time.sleep(main.INTERVAL_SECONDS)
+
+print("OK: ningún lote en vivo tiene timestamps posteriores a ahora")
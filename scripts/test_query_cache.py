@@ -0,0 +1,96 @@
+# scripts/test_query_cache.py
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Agrega la raíz del proyecto al path para importar scripts/
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from scripts.query_cache import QueryCache, normalize_sql, referenced_tables
+
+# SQLite en memoria como warehouse: mismo manifiesto (table_name, partition_key, load_version)
+engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+with engine.begin() as connection:
+    connection.execute(text(
+        "CREATE TABLE etl_load_manifest (table_name TEXT, partition_key TEXT, load_version INTEGER, "
+        "PRIMARY KEY (table_name, partition_key))"
+    ))
+    connection.execute(text("CREATE TABLE fact_transactions (transaction_id INTEGER, time_id INTEGER, amount REAL)"))
+    connection.execute(text("CREATE TABLE dim_time (time_id INTEGER, month TEXT)"))
+    connection.execute(text("INSERT INTO dim_time VALUES (1, '2025-09'), (2, '2025-10')"))
+    connection.execute(text("INSERT INTO fact_transactions VALUES (1, 1, 10), (2, 2, 20)"))
+
+
+def cargar(table, partition, sql=None):
+    """Simula un loader: escribe (opcional) e incrementa el manifiesto en la misma transacción."""
+    with engine.begin() as connection:
+        if sql:
+            connection.execute(text(sql))
+        connection.execute(text(
+            "INSERT INTO etl_load_manifest VALUES (:table, :partition, 1) "
+            "ON CONFLICT (table_name, partition_key) DO UPDATE SET load_version = load_version + 1"
+        ), {"table": table, "partition": partition})
+
+
+cargar("fact_transactions", "2025-09")
+cargar("fact_transactions", "2025-10")
+cargar("dim_time", "2025-09")
+cargar("dim_time", "2025-10")
+
+# Tablas referenciadas: JOIN, listas con comas y subconsultas
+assert referenced_tables(normalize_sql(
+    "SELECT * FROM fact_transactions f, dim_time t WHERE f.time_id = t.time_id"
+)) == ["dim_time", "fact_transactions"]
+assert referenced_tables(normalize_sql(
+    "SELECT * FROM (SELECT * FROM dim_users) u, public.dim_time t JOIN fact_transactions f ON f.time_id = t.time_id"
+)) == ["dim_time", "dim_users", "fact_transactions"]
+print("OK: referenced_tables detecta JOIN, comas y subconsultas")
+
+disk_folder = Path(tempfile.mkdtemp(prefix="query_cache_"))
+cache = QueryCache(engine=engine, disk_folder=disk_folder)
+SEPTEMBER = """
+    SELECT SUM(f.amount) AS total FROM fact_transactions f, dim_time t
+    WHERE f.time_id = t.time_id AND t.month = :month
+"""
+
+
+def consultar(partitions=("2025-09",)):
+    """Ejecuta la consulta de septiembre y retorna (resultado, 'HIT' o 'MISS')."""
+    hits = cache.hits
+    df = cache.query(SEPTEMBER, params={"month": "2025-09"}, partitions=partitions)
+    return df.iloc[0, 0], "HIT" if cache.hits > hits else "MISS"
+
+
+assert consultar() == (10, "MISS")
+assert consultar() == (10, "HIT")
+print("OK: la segunda ejecución sale de la caché")
+
+cargar("fact_transactions", "2025-10", "INSERT INTO fact_transactions VALUES (3, 2, 30)")
+cargar("dim_time", "2025-10")
+assert consultar() == (10, "HIT")
+print("OK: cargar octubre no invalida la consulta de septiembre")
+
+assert consultar(partitions=None) == (10, "MISS")
+cargar("fact_transactions", "2025-10")
+assert consultar(partitions=None) == (10, "MISS")
+print("OK: sin particiones declaradas, cualquier carga invalida")
+
+cargar("fact_transactions", "2025-09", "INSERT INTO fact_transactions VALUES (4, 1, 5)")
+assert consultar() == (15, "MISS")
+print("OK: una carga del mes consultado invalida y devuelve el dato nuevo")
+
+cargar("dim_time", "2025-09")
+assert consultar() == (15, "MISS")
+print("OK: la tabla de la lista con comas (dim_time) también invalida")
+
+# El almacén en disco sobrevive a un proceso nuevo
+cache = QueryCache(engine=engine, disk_folder=disk_folder)
+assert consultar() == (15, "HIT")
+print("OK: una caché nueva responde desde el disco")
+
+shutil.rmtree(disk_folder)
@@ -0,0 +1,70 @@
+# scripts/test_rapid_detection.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Agrega la raíz del proyecto al path para importar scripts/
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from scripts.rapid_detection import rapid_transaction_mask, rapid_transactions
+
+WINDOW = 60
+
+
+def marcar(users, times):
+    return rapid_transaction_mask(np.array(users), np.array(times, dtype=np.int64), WINDOW).tolist()
+
+
+# Ambos lados del par, no solo la segunda transacción (y sin depender del orden de entrada)
+assert marcar([1, 1], [0, 30]) == [True, True]
+assert marcar([1, 1], [30, 0]) == [True, True]
+assert marcar([1, 1], [0, 60]) == [True, True]  # La ventana es inclusiva
+assert marcar([1, 1], [0, 61]) == [False, False]
+print("OK: se marcan ambos lados del par y la ventana es inclusiva")
+
+# Mismo timestamp: ráfaga dentro del mismo segundo
+assert marcar([7, 7, 7], [100, 100, 100]) == [True, True, True]
+print("OK: transacciones con el mismo timestamp son rápidas")
+
+# Solo cuentan pares del mismo usuario
+assert marcar([1, 2, 1], [0, 10, 500]) == [False, False, False]
+assert marcar([1, 2, 2, 1], [0, 10, 20, 500]) == [False, True, True, False]
+print("OK: usuarios distintos no forman pares")
+
+# NaT (int64 mínimo) no forma pares ni rompe la clave compuesta
+nat = np.iinfo(np.int64).min
+assert marcar([1, 1, 1], [nat, 0, 200]) == [False, False, False]
+assert marcar([1, 1, 1], [nat, 0, 30]) == [False, True, True]
+assert marcar([1], [0]) == [False]
+print("OK: los NaT se ignoran")
+
+df = pd.DataFrame({
+    'user_id': [5, 5, 5, 9],
+    'timestamp': pd.to_datetime(['2025-10-01 10:00:00', None, '2025-10-01 10:00:59', '2025-10-01 10:00:30']),
+})
+assert rapid_transactions(df).tolist() == [True, False, True, False]
+print("OK: rapid_transactions sobre un DataFrame con NaT")
+
+
+def fuerza_bruta(users, times):
+    """Referencia O(n^2): ¿hay otra transacción del mismo usuario a <= WINDOW?"""
+    valid = times != nat
+    same = (users[:, None] == users[None, :]) & valid[:, None] & valid[None, :]
+    close = np.abs(times[:, None] - times[None, :]) <= WINDOW
+    np.fill_diagonal(same, False)
+    return (same & close).any(axis=1)
+
+
+rng = np.random.default_rng(2025)
+for trial in range(50):
+    n = int(rng.integers(2, 300))
+    users = rng.integers(0, 20, size=n)
+    if trial % 2:
+        users = users * (2 ** 55)  # Fuerza el camino de np.lexsort (la clave no cabe en int64)
+    times = rng.integers(0, 3600, size=n).astype(np.int64)
+    times[rng.random(n) < 0.05] = nat
+    assert (rapid_transaction_mask(users, times, WINDOW) == fuerza_bruta(users, times)).all(), trial
+print("OK: coincide con la referencia por fuerza bruta (clave compuesta y lexsort)")
@@ -0,0 +1,78 @@
+# scripts/test_sketches.py
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Agrega la raíz del proyecto al path para importar scripts/
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from scripts.sketches import HeavyHitters, HyperLogLogSketch, SketchStore
+
+# HyperLogLog: la unión de dos sketches estima la unión de los conjuntos
+a, b = HyperLogLogSketch(), HyperLogLogSketch()
+a.update(np.full(3000, 1), np.arange(0, 3000))
+b.update(np.full(3000, 1), np.arange(2000, 5000))
+a.update(np.full(10, 2), np.arange(10))
+combined = HyperLogLogSketch.combine([a, b])
+estimates = combined.estimates()
+assert abs(estimates[1] - 5000) / 5000 < 0.1, estimates[1]
+assert abs(estimates[2] - 10) <= 1, estimates[2]
+merged = HyperLogLogSketch(cells=a.cells.copy(), ranks=a.ranks.copy())
+merged.merge(b)
+assert np.array_equal(merged.cells, combined.cells) and np.array_equal(merged.ranks, combined.ranks)
+print(f"OK: HLL combinado estima {estimates[1]:,.0f} usuarios distintos (real 5,000); merge == combine")
+
+# Heavy hitters: el peso combinado nunca subestima y el mayor queda primero
+h1, h2 = HeavyHitters(), HeavyHitters()
+h1.update(np.array([7, 8, 9]), np.array([500.0, 20.0, 10.0]))
+h2.update(np.array([7, 9, 11]), np.array([300.0, 50.0, 5.0]))
+top = HeavyHitters.combine([h1, h2]).top(3)
+assert top.index[0] == 7 and top.iloc[0] >= 800
+assert top[9] >= 60
+print(f"OK: heavy hitters combinados {top.to_dict()}")
+
+
+def lote(minutes, users_per_minute=50):
+    """Transacciones repartidas en los minutos indicados (comercio 1, país MX)."""
+    rows = []
+    for minute in minutes:
+        for user in range(users_per_minute):
+            rows.append({
+                "merchant_id": 1, "user_id": minute * 1000 + user, "country": "MX", "amount_usd": 10.0,
+                "timestamp": pd.Timestamp("2025-10-01 10:00:00") + pd.Timedelta(minutes=minute, seconds=user % 60),
+            })
+    return pd.DataFrame(rows)
+
+
+# SketchStore: buckets por minuto, retención de 3 buckets y persistencia
+folder = Path(tempfile.mkdtemp(prefix="sketches_"))
+store = SketchStore(folder, bucket_seconds=60, retention_buckets=3)
+df = lote(range(3))
+store.update(df, df[df["user_id"] % 10 == 0])
+store.save()
+assert len(list(folder.glob("*.npz"))) == 3
+first_bucket = min(store.buckets)
+
+df = lote([3, 4])
+store.update(df, df.iloc[0:0])
+store.save()
+assert sorted(store.buckets) == [first_bucket + 2, first_bucket + 3, first_bucket + 4]
+assert sorted(int(p.stem) for p in folder.glob("*.npz")) == sorted(store.buckets)
+print("OK: los buckets fuera de la retención se descartan en memoria y en disco")
+
+reloaded = SketchStore(folder, bucket_seconds=60, retention_buckets=3)
+assert sorted(reloaded.buckets) == sorted(store.buckets)
+distinct = reloaded.distinct("distinct_users_by_merchant")
+assert abs(distinct[1] - 150) <= 8, distinct[1]
+assert abs(reloaded.distinct("distinct_users_by_country")["MX"] - 150) <= 8
+window = reloaded.distinct("distinct_users_by_merchant", "2025-10-01 10:03:00", "2025-10-01 10:05:00")
+assert abs(window[1] - 100) <= 5, window[1]
+print(f"OK: tras recargar, {distinct[1]:.0f} usuarios distintos en los buckets retenidos (real 150)")
+
+# De las sospechosas (minutos 0 a 2) solo queda el minuto 2, el único bucket retenido
+assert sorted(reloaded.heavy_hitters("suspicious_count_by_user", n=50).index) == [2000, 2010, 2020, 2030, 2040]
+print("OK: solo quedan las sospechosas de los buckets retenidos")
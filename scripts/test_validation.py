@@ -0,0 +1,73 @@
+# scripts/test_validation.py
+
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# Agrega la raíz del proyecto al path para importar main.py
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from main import clean_data
+from scripts.dedupe_index import DedupeIndex
+from scripts.generate_transactions import GeneratorConfig, generate_transactions_fast
+from scripts.transaction_schema import encode_transaction_ids
+from scripts.validation import CHECKS
+
+# Lote limpio: sin duplicados ni nulos inyectados, en la última hora
+config = GeneratorConfig(duplicate_rate=0, null_rate=0, fraud_rate=0,
+                         start_time=datetime.now() - timedelta(hours=1), batch_seconds=1800)
+df = generate_transactions_fast(100, config).astype(object)
+report = {}
+assert len(clean_data(df, validation_report=report)) == 100
+assert len(report['rejected']) == 0 and not any(report['counts'].values())
+print("OK: un lote válido no tiene rechazos")
+
+# Una fila corrupta por validación (la fila 11 combina dos)
+future = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+corrupt = {
+    0: ('currency', None, 'missing'),
+    1: ('transaction_id', 'XYZ', 'bad_id'),
+    2: ('amount', 'abc', 'bad_amount'),
+    3: ('timestamp', 'not a date', 'bad_timestamp'),
+    4: ('currency', 'ZZZ', 'unknown_currency'),
+    5: ('country', 'XX', 'unknown_country'),
+    6: ('status', 'weird', 'unknown_code'),
+    7: ('amount', -5, 'non_positive_amount'),
+    8: ('timestamp', future, 'future_timestamp'),
+    10: ('transaction_id', df.at[9, 'transaction_id'], 'duplicate_in_batch'),
+}
+expected = {row: CHECKS[check] for row, (_, _, check) in corrupt.items()}
+for row, (column, value, _) in corrupt.items():
+    df.at[row, column] = value
+df.at[11, 'amount'] = 0
+df.at[11, 'payment_method'] = 'cheque'
+expected[11] = CHECKS['non_positive_amount'] | CHECKS['unknown_code']
+
+# Un ID ya procesado en un lote anterior
+index = DedupeIndex(tempfile.mkdtemp(prefix="dedupe_index_"))
+index.add(encode_transaction_ids(df.loc[[20], 'transaction_id']).to_numpy(dtype=np.int64))
+expected[20] = CHECKS['duplicate']
+
+report = {}
+cleaned = clean_data(df, dedupe_index=index, validation_report=report)
+rejected = report['rejected']
+masks = dict(zip(rejected.index, rejected['reject_mask']))
+assert masks == expected, masks
+assert len(cleaned) == len(df) - len(expected)
+assert not cleaned.index.isin(list(expected)).any()
+print("OK: cada fila rechazada tiene exactamente los bits de sus validaciones")
+
+# La fila 9 es la primera aparición del ID repetido: se conserva
+assert 9 in cleaned.index
+# Los rechazos conservan los valores tal como llegaron
+assert rejected.at[2, 'amount'] == 'abc' and rejected.at[1, 'transaction_id'] == 'XYZ'
+print("OK: se conserva la primera aparición y los rechazos guardan los valores originales")
+
+counts = report['counts']
+for check in CHECKS:
+    total = sum(1 for mask in expected.values() if mask & CHECKS[check])
+    assert counts[check] == total, (check, counts[check], total)
+print(f"OK: conteos por validación {counts}")
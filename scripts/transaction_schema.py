@@ -0,0 +1,83 @@
+"""
+Representación compacta en memoria de las transacciones.
+
+Las columnas de texto con pocos valores distintos (currency, status, payment_method,
+country) se guardan como categóricas con diccionarios fijos y compartidos por todo
+el pipeline, y transaction_id ('TXN' + 8 dígitos) como int64. Los IDs de usuario
+y comercio pasan a int32.
+
+El pipeline trabaja con esta representación de punta a punta; solo se decodifica
+al escribir los archivos de salida (to_output_frame).
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Diccionarios fijos de categorías (valores ya estandarizados en mayúsculas)
+CURRENCIES = ["ARS", "BRL", "CLP", "COP", "MXN", "PEN", "USD"]
+STATUSES = ["APPROVED", "CANCELLED", "DECLINED", "PENDING", "REFUNDED"]
+PAYMENT_METHODS = ["BANK_TRANSFER", "CREDIT_CARD", "DEBIT_CARD", "EWALLET"]
+COUNTRIES = ["AR", "BR", "CL", "CO", "MX", "PE", "US"]
+
+CURRENCY_DTYPE = pd.CategoricalDtype(CURRENCIES)
+STATUS_DTYPE = pd.CategoricalDtype(STATUSES)
+PAYMENT_METHOD_DTYPE = pd.CategoricalDtype(PAYMENT_METHODS)
+COUNTRY_DTYPE = pd.CategoricalDtype(COUNTRIES)
+
+CATEGORICAL_COLUMNS = {
+    "currency": CURRENCY_DTYPE,
+    "status": STATUS_DTYPE,
+    "payment_method": PAYMENT_METHOD_DTYPE,
+    "country": COUNTRY_DTYPE,
+}
+
+TRANSACTION_ID_PREFIX = "TXN"
+TRANSACTION_ID_DIGITS = 8
+
+
+def to_fixed_categorical(series, dtype):
+    """
+    Convierte una columna de texto a una categórica con diccionario fijo.
+
+    La estandarización (mayúsculas, sin espacios) se aplica solo a los valores
+    únicos, no fila por fila. Los valores fuera del diccionario quedan como NaN.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype) and series.dtype == dtype:
+        return series
+    codes, uniques = pd.factorize(series)
+    normalized = pd.Index(uniques.astype(str)).str.upper().str.strip()
+    mapping = dtype.categories.get_indexer(normalized)
+    fixed_codes = np.where(codes >= 0, mapping[codes] if len(mapping) else -1, -1)
+    return pd.Series(pd.Categorical.from_codes(fixed_codes, dtype=dtype), index=series.index, name=series.name)
+
+
+def encode_transaction_ids(series):
+    """
+    Convierte IDs 'TXN00000001' a int64 (1). Los IDs mal formados quedan como NaN.
+
+    Returns:
+        pd.Series: IDs numéricos (Int64 con nulos si hay IDs inválidos)
+    """
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return series
+    text = series.astype(str).str.upper().str.strip()
+    has_prefix = text.str.startswith(TRANSACTION_ID_PREFIX)
+    numbers = pd.to_numeric(text.str.slice(len(TRANSACTION_ID_PREFIX)).where(has_prefix), errors="coerce")
+    return numbers.astype("Int64")
+
+
+def decode_transaction_ids(series):
+    """Convierte IDs int64 de vuelta al formato 'TXN' + 8 dígitos."""
+    if not pd.api.types.is_integer_dtype(series.dtype):
+        return series
+    return TRANSACTION_ID_PREFIX + series.astype(str).str.zfill(TRANSACTION_ID_DIGITS)
+
+
+def to_output_frame(df):
+    """Decodifica el lote para escribirlo (las categóricas se escriben como texto)."""
+    if "transaction_id" not in df.columns:
+        return df
+    df = df.copy()
+    df["transaction_id"] = decode_transaction_ids(df["transaction_id"])
+    return df
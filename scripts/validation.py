@@ -0,0 +1,117 @@
+"""
+Validación vectorizada del lote crudo con cuarentena de rechazos.
+
+clean_data() evalúa todas las validaciones de una vez como máscaras booleanas sobre
+columnas completas (sin Python por fila) y las combina en un bitmask uint16 por
+fila, con un bit por validación (CHECKS):
+
+- missing: nulo en una columna crítica.
+- bad_id / bad_amount / bad_timestamp: el valor existe pero no se pudo convertir
+  (transaction_id mal formado, IDs o monto no numéricos, timestamp inválido).
+- unknown_currency / unknown_country / unknown_code: código fuera de los
+  diccionarios de scripts/transaction_schema.py (unknown_code cubre status y
+  payment_method).
+- non_positive_amount: monto <= 0.
+- duplicate: transaction_id ya procesado en un lote anterior (scripts/dedupe_index.py).
+  No lo marca validation_mask(): clean_data() lo agrega al consultar el índice.
+- duplicate_in_batch: transaction_id repetido dentro del mismo lote; se conserva
+  la primera aparición y se marcan las siguientes (aunque el resto de la fila difiera).
+- future_timestamp: timestamp posterior a ahora + la tolerancia. main.py usa el
+  mayor entre FUTURE_TOLERANCE_SECONDS y PIPELINE_INTERVAL_SECONDS, así un
+  intervalo largo no rechaza lotes completos por desfase de reloj.
+
+Las filas con bitmask distinto de 0 no siguen en el pipeline. process_batch()
+las escribe tal como llegaron, con la columna 'reject_mask', en ./rejected (un
+archivo por lote) e imprime el conteo por validación.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Configuración
+FUTURE_TOLERANCE_SECONDS = 300  # Mínimo; main.py lo amplía a un intervalo si es mayor
+
+# Bit de cada validación en 'reject_mask'
+CHECK_MISSING = 1 << 0
+CHECK_BAD_ID = 1 << 1
+CHECK_BAD_AMOUNT = 1 << 2
+CHECK_BAD_TIMESTAMP = 1 << 3
+CHECK_UNKNOWN_CURRENCY = 1 << 4
+CHECK_UNKNOWN_COUNTRY = 1 << 5
+CHECK_UNKNOWN_CODE = 1 << 6
+CHECK_NON_POSITIVE_AMOUNT = 1 << 7
+CHECK_FUTURE_TIMESTAMP = 1 << 8
+CHECK_DUPLICATE = 1 << 9
+CHECK_DUPLICATE_IN_BATCH = 1 << 10
+CHECKS = {
+    'missing': CHECK_MISSING,
+    'bad_id': CHECK_BAD_ID,
+    'bad_amount': CHECK_BAD_AMOUNT,
+    'bad_timestamp': CHECK_BAD_TIMESTAMP,
+    'unknown_currency': CHECK_UNKNOWN_CURRENCY,
+    'unknown_country': CHECK_UNKNOWN_COUNTRY,
+    'unknown_code': CHECK_UNKNOWN_CODE,
+    'non_positive_amount': CHECK_NON_POSITIVE_AMOUNT,
+    'future_timestamp': CHECK_FUTURE_TIMESTAMP,
+    'duplicate': CHECK_DUPLICATE,
+    'duplicate_in_batch': CHECK_DUPLICATE_IN_BATCH,
+}
+
+# Bit que se marca cuando un valor presente no sobrevive a la conversión de tipo
+COERCION_CHECKS = {
+    'transaction_id': CHECK_BAD_ID,
+    'user_id': CHECK_BAD_ID,
+    'merchant_id': CHECK_BAD_ID,
+    'amount': CHECK_BAD_AMOUNT,
+    'timestamp': CHECK_BAD_TIMESTAMP,
+    'currency': CHECK_UNKNOWN_CURRENCY,
+    'country': CHECK_UNKNOWN_COUNTRY,
+    'status': CHECK_UNKNOWN_CODE,
+    'payment_method': CHECK_UNKNOWN_CODE,
+}
+
+
+def _set(reject_mask, condition, bit):
+    reject_mask |= np.asarray(condition, dtype=bool).astype(np.uint16) * np.uint16(bit)
+
+
+def validation_mask(raw, coerced, now=None, future_tolerance=FUTURE_TOLERANCE_SECONDS):
+    """
+    Evalúa todas las validaciones sobre el lote.
+
+    Args:
+        raw (pd.DataFrame): Columnas críticas tal como llegaron
+        coerced (pd.DataFrame): Las mismas columnas ya convertidas (NaN donde la conversión falló)
+        now (datetime): Referencia para future_timestamp (por defecto, ahora)
+        future_tolerance (int): Segundos por delante del reloj que se aceptan
+
+    Returns:
+        np.ndarray: Bitmask uint16 por fila (0 = fila válida)
+    """
+    reject_mask = np.zeros(len(raw), dtype=np.uint16)
+    raw_missing = raw.isna()
+    _set(reject_mask, raw_missing.any(axis=1), CHECK_MISSING)
+    for column, bit in COERCION_CHECKS.items():
+        _set(reject_mask, coerced[column].isna().to_numpy() & ~raw_missing[column].to_numpy(), bit)
+
+    # Las comparaciones con NaN / NaT dan False: esas filas ya quedaron marcadas arriba
+    _set(reject_mask, coerced['amount'].to_numpy(dtype=float) <= 0, CHECK_NON_POSITIVE_AMOUNT)
+    limit = pd.Timestamp(now if now is not None else pd.Timestamp.now()) + pd.Timedelta(seconds=future_tolerance)
+    _set(reject_mask, (coerced['timestamp'] > limit).to_numpy(), CHECK_FUTURE_TIMESTAMP)
+    ids = coerced['transaction_id']
+    _set(reject_mask, (ids.duplicated(keep='first') & ids.notna()).to_numpy(), CHECK_DUPLICATE_IN_BATCH)
+    return reject_mask
+
+
+def check_counts(reject_mask):
+    """Filas marcadas por cada validación (una fila puede contar en varias)."""
+    return {name: int(np.count_nonzero(reject_mask & bit)) for name, bit in CHECKS.items()}
+
+
+def reject_frame(raw, reject_mask):
+    """Filas rechazadas con sus valores originales y la columna 'reject_mask'."""
+    rejected = reject_mask != 0
+    df = raw[rejected].copy()
+    df['reject_mask'] = reject_mask[rejected]
+    return df
@@ -0,0 +1,194 @@
+"""
+Reglas de velocidad y límite diario basadas en agregados incrementales.
+
+En lugar de reagrupar todas las transacciones del día en cada lote, se mantienen
+sumas y conteos diarios por usuario en arrays de NumPy indexados por ID. Cada lote
+confirmado los actualiza en O(tamaño del lote) con `np.add.at` (record_velocity(),
+después del commit del journal: un reintento no cuenta el lote dos veces).
+
+Reglas que alimentan a detect_suspicious_transactions():
+- daily_limit_exceeded: el gasto aprobado acumulado del día supera el
+  transaction_limit_daily del usuario (requiere enrich_transactions()).
+- hourly_velocity_exceeded: el usuario supera N transacciones en la misma hora.
+
+Los agregados son por día calendario del timestamp de la transacción. Se conservan
+los últimos RETENTION_DAYS días para tolerar datos algo atrasados; lo anterior se
+descarta al cruzar el cambio de día. Las transacciones de días ya descartados no
+se evalúan.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Configuración
+HOURLY_TRANSACTION_LIMIT = 10  # Máximo de transacciones por usuario en una misma hora
+RETENTION_DAYS = 2  # Días de agregados que se mantienen en memoria
+SPEND_STATUSES = ["APPROVED"]  # Estados que cuentan como gasto para el límite diario
+
+
+def _grow(array, size, axis=-1):
+    """Extiende un array con ceros hasta `size` posiciones en el eje indicado."""
+    current = array.shape[axis]
+    if size <= current:
+        return array
+    pad = [(0, 0)] * array.ndim
+    pad[axis] = (0, size - current)
+    return np.pad(array, pad)
+
+
+def _running_totals(keys, order_by, values):
+    """
+    Suma acumulada de `values` por clave, en orden de `order_by` dentro de cada clave.
+
+    Returns:
+        np.ndarray: Acumulado (inclusive) de cada fila en el orden original
+    """
+    order = np.lexsort((order_by, keys))
+    sorted_keys = keys[order]
+    sorted_values = values[order]
+    cumulative = np.cumsum(sorted_values)
+    starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    start_idx = np.maximum.accumulate(np.where(starts, np.arange(len(keys)), 0))
+    within = cumulative - (cumulative - sorted_values)[start_idx]
+    result = np.empty_like(within)
+    result[order] = within
+    return result
+
+
+class DayAggregates:
+    """Gasto del día y conteos por hora, indexados por user_id."""
+
+    def __init__(self):
+        self.user_sum = np.zeros(0)
+        self.user_hourly = np.zeros((24, 0), dtype=np.uint16)
+
+    def ensure_size(self, user_size):
+        self.user_sum = _grow(self.user_sum, user_size)
+        self.user_hourly = _grow(self.user_hourly, user_size)
+
+
+class VelocityTracker:
+    """
+    Mantiene los agregados diarios y marca las transacciones que violan las reglas.
+
+    evaluate() solo lee los agregados; record() les suma un lote y se llama después de
+    confirmar el lote en el journal. Así un lote que falla y se reintenta no se
+    cuenta dos veces.
+    """
+
+    def __init__(self, hourly_limit=HOURLY_TRANSACTION_LIMIT, retention_days=RETENTION_DAYS):
+        self.hourly_limit = hourly_limit
+        self.retention_days = retention_days
+        self.days = {}  # día (int, días desde epoch) -> DayAggregates
+        self.current_day = None
+
+    def _advance(self, day):
+        """Mueve el día actual y descarta los agregados fuera de la retención."""
+        if self.current_day is None or day > self.current_day:
+            self.current_day = day
+            oldest = day - self.retention_days + 1
+            self.days = {d: agg for d, agg in self.days.items() if d >= oldest}
+
+    def _batch_days(self, df):
+        """
+        Arrays del lote agrupados por día retenido.
+
+        Returns:
+            tuple: (iterable de (día, filas), users, is_spend, spend, epoch, hour)
+        """
+        users = pd.to_numeric(df['user_id'], errors='coerce').to_numpy(dtype=float)
+        timestamps = pd.to_datetime(df['timestamp'])
+        valid = np.isfinite(users) & (users >= 0) & timestamps.notna().to_numpy()
+
+        amount_column = 'amount_usd' if 'amount_usd' in df.columns else 'amount'
+        is_spend = df['status'].isin(SPEND_STATUSES).to_numpy()
+        spend = np.where(is_spend, df[amount_column].to_numpy(dtype=float, na_value=0.0), 0.0)
+        spend = np.nan_to_num(spend)
+
+        epoch = np.zeros(len(df), dtype=np.int64)
+        epoch[valid] = timestamps[valid].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        day = epoch // 86400
+        hour = (epoch % 86400) // 3600
+
+        batch_days = np.unique(day[valid])
+        latest = int(batch_days.max()) if len(batch_days) else None
+        if self.current_day is not None and (latest is None or self.current_day > latest):
+            latest = self.current_day
+        groups = [
+            (int(d), np.flatnonzero(valid & (day == d)))
+            for d in batch_days
+            # Día ya descartado (o que se descartará con este lote): dato demasiado atrasado
+            if d >= latest - self.retention_days + 1
+        ]
+        return groups, users, is_spend, spend, epoch, hour
+
+    def evaluate(self, df):
+        """
+        Agrega las columnas de las reglas sin sumar el lote a los agregados.
+
+        Args:
+            df (pd.DataFrame): Transacciones limpias (idealmente enriquecidas)
+
+        Returns:
+            pd.DataFrame: Copia con 'daily_limit_exceeded' y 'hourly_velocity_exceeded'
+        """
+        df = df.copy()
+        n = len(df)
+        limit_exceeded = np.zeros(n, dtype=bool)
+        velocity_exceeded = np.zeros(n, dtype=bool)
+        limits = df['user_daily_limit'].to_numpy(dtype=float) if 'user_daily_limit' in df.columns else None
+
+        groups, users, is_spend, spend, epoch, hour = self._batch_days(df)
+        for d, rows in groups:
+            agg = self.days.get(d) or DayAggregates()
+            u = users[rows].astype(np.int64)
+            h = hour[rows]
+            agg.ensure_size(int(u.max()) + 1)  # Solo agrega ceros: no cambia los totales
+
+            # Límite diario: gasto previo del día + acumulado dentro del lote
+            running_spend = agg.user_sum[u] + _running_totals(u, epoch[rows], spend[rows])
+            if limits is not None:
+                limit_exceeded[rows] = is_spend[rows] & (running_spend > limits[rows])
+
+            # Velocidad: transacciones previas en la hora + acumulado dentro del lote
+            hourly_key = u * 24 + h
+            running_count = agg.user_hourly[h, u] + _running_totals(hourly_key, epoch[rows], np.ones(len(rows), dtype=np.int64))
+            velocity_exceeded[rows] = running_count > self.hourly_limit
+
+        df['daily_limit_exceeded'] = limit_exceeded
+        df['hourly_velocity_exceeded'] = velocity_exceeded
+        return df
+
+    def record(self, df):
+        """Suma un lote ya confirmado a los agregados diarios."""
+        groups, users, is_spend, spend, epoch, hour = self._batch_days(df)
+        for d, _ in groups:
+            self._advance(d)
+        for d, rows in groups:
+            agg = self.days.setdefault(d, DayAggregates())
+            u = users[rows].astype(np.int64)
+            agg.ensure_size(int(u.max()) + 1)
+            np.add.at(agg.user_sum, u, spend[rows])
+            np.add.at(agg.user_hourly, (hour[rows], u), 1)
+
+
+_velocity_tracker = None
+
+
+def get_velocity_tracker():
+    """Retorna el VelocityTracker compartido del proceso."""
+    global _velocity_tracker
+    if _velocity_tracker is None:
+        _velocity_tracker = VelocityTracker()
+    return _velocity_tracker
+
+
+def apply_velocity_rules(df):
+    """Evalúa las reglas de velocidad con los agregados compartidos (sin actualizarlos)."""
+    return get_velocity_tracker().evaluate(df)
+
+
+def record_velocity(df):
+    """Suma un lote confirmado a los agregados compartidos."""
+    get_velocity_tracker().record(df)
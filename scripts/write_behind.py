@@ -0,0 +1,82 @@
+"""
+Escritura diferida (write-behind) de los lotes crudos al Data Lake.
+
+En el modo en memoria de main.py el lote generado pasa directo a limpieza y
+detección. La copia en ./transactions se escribe en un hilo de fondo para que
+la latencia de detección no incluya el disco:
+
+- La cola es acotada (WRITE_BEHIND_MAX_PENDING lotes). Si el disco no da abasto,
+  submit() bloquea al productor (backpressure) en lugar de acumular memoria.
+- Cada archivo se escribe de forma atómica (scripts/io_utils.py), con
+  WRITE_RETRIES reintentos.
+- close() vacía la cola antes de terminar. main.py lo llama al detenerse.
+
+Si el proceso muere con lotes en la cola, esos archivos crudos no llegan al
+disco. El journal los tiene registrados (begin) y la recuperación los marca
+como perdidos (missing). Las salidas de los lotes ya confirmados no se ven
+afectadas.
+"""
+
+import queue
+import threading
+import time
+
+from scripts.io_utils import atomic_write_csv
+
+
+# Configuración
+WRITE_BEHIND_MAX_PENDING = 8  # Lotes en cola antes de bloquear al productor
+WRITE_RETRIES = 3
+RETRY_DELAY_SECONDS = 0.5
+
+
+class WriteBehindWriter:
+    """Hilo de fondo que persiste DataFrames con una cola acotada."""
+
+    def __init__(self, max_pending=WRITE_BEHIND_MAX_PENDING, write_fn=atomic_write_csv):
+        self.write_fn = write_fn
+        self.written = 0
+        self.errors = []
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, df, path):
+        """Encola un lote para escribir; bloquea si la cola está llena."""
+        self._queue.put((df, path))
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def _write(self, df, path):
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                self.write_fn(df, path)
+                self.written += 1
+                return
+            except Exception as e:
+                if attempt == WRITE_RETRIES:
+                    self.errors.append((path, e))
+                    print(f"ERROR: Write-behind could not save {path}: {e}")
+                    return
+                time.sleep(RETRY_DELAY_SECONDS * attempt)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Espera a que se escriban todos los lotes encolados."""
+        self._queue.join()
+
+    def close(self):
+        """Vacía la cola y detiene el hilo."""
+        self._queue.put(None)
+        self._thread.join()